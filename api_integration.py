@@ -1,7 +1,18 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 # Set up logging
 logging.basicConfig(
@@ -13,26 +24,296 @@ logging.basicConfig(
 # Base API URL for OpenDota
 BASE_URL = "https://api.opendota.com/api"
 
+# Maximum number of requests in flight at once (also the connection pool size)
+MAX_CONCURRENCY = 5
+
+# Seconds to wait for the API before giving up on a request
+REQUEST_TIMEOUT = 30
+
+# Endpoints that return matches newest-first and are harvested page by page
+PAGINATED_ENDPOINTS = {"proMatches", "publicMatches"}
+
+# Maximum number of pages walked back per harvest
+MAX_PAGES = 50
+
+# File storing the newest match id harvested from each paginated endpoint
+CHECKPOINT_FILE = "harvest_checkpoints.json"
+
+# Serializes read-modify-write of the checkpoint file across fetch threads
+checkpoint_lock = threading.Lock()
+
+# Checkpoints reached by this run's harvests, saved once their matches are written out
+pending_checkpoints = {}
+
+# Directory holding cached responses: one sub-folder per API root, one JSON file per endpoint
+CACHE_DIR = "api_cache"
+
+# Seconds a cached response is used without asking the API; after that it is
+# revalidated with If-None-Match / If-Modified-Since. Endpoints not listed are not cached.
+CACHE_TTLS = {
+    "heroStats": 6 * 60 * 60,
+    "teams": 24 * 60 * 60,
+    "leagues": 24 * 60 * 60
+}
+
+# Cache counters for the run: fresh hits, 304 revalidations and misses
+cache_stats = {"hits": 0, "revalidated": 0, "misses": 0}
+cache_lock = threading.Lock()
+
+# Root folder for saved data; override with the OPENDOTA_OUTPUT_ROOT environment variable
+OUTPUT_ROOT = os.environ.get("OPENDOTA_OUTPUT_ROOT", r'C:\Users\kaur6\Downloads\BuildProject-ECommerce\Datasets')
+
+# Formats written by main(): "parquet" for columnar readers, "csv" for the NiFi flow
+OUTPUT_FORMATS = ["parquet", "csv"]
+
+# Records converted and written per Parquet row group
+PARQUET_BATCH_SIZE = 10000
+PARQUET_COMPRESSION = "zstd"
+
+# Client-side rate limit: sustained requests per second and the allowed burst
+REQUESTS_PER_SECOND = 1.0
+RATE_LIMIT_BURST = MAX_CONCURRENCY
+
+# Retry policy for rate-limited (429) and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0   # Seconds before the first retry, doubled on every attempt
+BACKOFF_MAX = 60.0   # Longest backoff between two attempts (a Retry-After header is honoured in full)
+
+# Per-endpoint request metrics for the run
+request_metrics = {}
+metrics_lock = threading.Lock()
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills at `rate` tokens per second up to
+    `capacity`, and acquire() blocks until a token is available. pause()
+    holds back every thread, e.g. while the server asks clients to back off.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = self.updated
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until the bucket has refilled enough."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Let no thread acquire a token for the next `seconds`; the bucket refills from empty afterwards."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.updated = self.paused_until
+
+# Limiter shared by every request of the process
+rate_limiter = TokenBucket(REQUESTS_PER_SECOND, RATE_LIMIT_BURST)
+
+# Function to create an HTTP session with a shared connection pool
+def create_session(pool_size=MAX_CONCURRENCY):
+    """
+    Create a requests session whose connection pool is shared by all requests.
+
+    Args:
+        pool_size (int): The number of connections kept open per host.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Functions for the on-disk response cache
+def cache_path(endpoint, base_url=BASE_URL, cache_dir=CACHE_DIR):
+    """
+    Return the cache file path for an endpoint of the given API root. Each root
+    gets its own folder, so a local stand-in server never shares the API's entries.
+    """
+    root = hashlib.sha1(base_url.rstrip("/").encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, root, f"{endpoint}.json")
+
+def read_cache(endpoint, base_url=BASE_URL, cache_dir=CACHE_DIR):
+    """
+    Read an endpoint's cached response.
+
+    Returns:
+        dict: The entry with data, fetched_at, etag and last_modified, or None.
+    """
+    try:
+        with open(cache_path(endpoint, base_url, cache_dir), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_cache(endpoint, entry, base_url=BASE_URL, cache_dir=CACHE_DIR):
+    """Write an endpoint's cache entry, replacing the old file atomically."""
+    path = cache_path(endpoint, base_url, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+def count_cache(outcome):
+    """Increment one of the run's cache counters."""
+    with cache_lock:
+        cache_stats[outcome] += 1
+
+# Functions for retries and request metrics
+def retry_delay(attempt, response=None):
+    """
+    Return the seconds to wait before the next attempt.
+
+    A Retry-After header (seconds or HTTP date) is honoured in full, however
+    long it is; otherwise the delay is exponential backoff with full jitter,
+    capped at BACKOFF_MAX.
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def record_metrics(endpoint, latency, nbytes, retries):
+    """Add one request's latency, response size and retry count to the endpoint's metrics."""
+    with metrics_lock:
+        metrics = request_metrics.setdefault(endpoint, {"requests": 0, "retries": 0, "seconds": 0.0, "bytes": 0})
+        metrics["requests"] += 1
+        metrics["retries"] += retries
+        metrics["seconds"] += latency
+        metrics["bytes"] += nbytes
+
+def format_metrics():
+    """Summarize the run's per-endpoint requests, retries, average latency and bytes/sec."""
+    lines = []
+    for endpoint, m in sorted(request_metrics.items()):
+        avg_latency = m["seconds"] / m["requests"] if m["requests"] else 0.0
+        throughput = m["bytes"] / m["seconds"] if m["seconds"] else 0.0
+        lines.append(f"{endpoint}: {m['requests']} requests, {m['retries']} retries, "
+                     f"avg latency {avg_latency:.3f}s, {throughput:.0f} bytes/sec")
+    return "\n".join(lines)
+
+def send_request(client, url, endpoint, params=None, headers=None):
+    """
+    Send a rate-limited GET request, retrying 429s, transient 5xx responses
+    and connection errors up to MAX_RETRIES times.
+
+    Returns:
+        requests.Response: The last response received.
+
+    Raises:
+        requests.exceptions.RequestException: If the last attempt failed to connect.
+    """
+    attempt = 0
+    while True:
+        rate_limiter.acquire()
+        start = time.perf_counter()
+        try:
+            response = client.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            if attempt >= MAX_RETRIES:
+                record_metrics(endpoint, time.perf_counter() - start, 0, attempt)
+                raise
+            delay = retry_delay(attempt)
+            logging.warning(f"Request to {endpoint} failed ({e}); retry {attempt + 1} in {delay:.1f}s")
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= MAX_RETRIES:
+                record_metrics(endpoint, time.perf_counter() - start, len(response.content), attempt)
+                return response
+            delay = retry_delay(attempt, response)
+            if response.status_code == 429:
+                # The limit is shared, so every thread waits, not only this one
+                rate_limiter.pause(delay)
+            logging.warning(f"{endpoint} returned {response.status_code}; retry {attempt + 1} in {delay:.1f}s")
+        time.sleep(delay)
+        attempt += 1
+
 # Function to fetch data from OpenDota API
-def get_data(endpoint):
+def get_data(endpoint, session=None, base_url=BASE_URL, params=None):
     """
     Fetch data from the OpenDota API for a given endpoint.
 
     Args:
         endpoint (str): The API endpoint to fetch data from.
+        session (requests.Session): Optional session to reuse pooled connections.
+        base_url (str): The API root, overridable to point at another server.
+        params (dict): Optional query string parameters.
+
+    Endpoints listed in CACHE_TTLS are served from the on-disk cache, kept
+    separately for each base_url, while their entry is younger than the TTL.
+    Older entries are revalidated with a conditional request, and a 304
+    response reuses the cached data.
+    Requests go through the shared rate limiter and are retried on 429 and
+    transient errors (see send_request).
 
     Returns:
         dict: The JSON response data if successful, else None.
     """
-    url = f"{BASE_URL}/{endpoint}"
+    url = f"{base_url}/{endpoint}"
+    client = session or requests
+    ttl = CACHE_TTLS.get(endpoint) if params is None else None
+    cached = read_cache(endpoint, base_url) if ttl is not None else None
+
+    headers = {}
+    if cached:
+        if time.time() - cached["fetched_at"] < ttl:
+            count_cache("hits")
+            logging.info(f"Cache hit for {endpoint}")
+            return cached["data"]
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
     try:
         # Send GET request to OpenDota API
-        response = requests.get(url)
+        response = send_request(client, url, endpoint, params, headers)
+
+        if response.status_code == 304 and cached:
+            cached["fetched_at"] = time.time()
+            write_cache(endpoint, cached, base_url)
+            count_cache("revalidated")
+            logging.info(f"Cache revalidated for {endpoint} (304 Not Modified)")
+            return cached["data"]
 
         # Check if the response status is OK (200)
         if response.status_code == 200:
             logging.info(f"Successfully fetched data from {endpoint}")
-            return response.json()
+            data = response.json()
+            if ttl is not None:
+                count_cache("misses")
+                write_cache(endpoint, {
+                    "fetched_at": time.time(),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "data": data
+                }, base_url)
+            return data
         else:
             logging.error(f"Failed to fetch data from {endpoint}. Status code: {response.status_code}")
             return None
@@ -41,6 +322,113 @@ def get_data(endpoint):
         logging.error(f"Error occurred while fetching {endpoint}: {e}")
         return None
 
+def load_checkpoints(checkpoint_file=CHECKPOINT_FILE):
+    """
+    Load the harvest checkpoints.
+
+    Args:
+        checkpoint_file (str): The JSON file holding the checkpoints.
+
+    Returns:
+        dict: The newest harvested match id keyed by endpoint, or for a harvest
+        that stopped at max_pages a dict with the last_seen match id it was
+        walking down to, the cursor it stopped at and the newest match id.
+    """
+    if not os.path.exists(checkpoint_file):
+        return {}
+    with open(checkpoint_file, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_checkpoint(endpoint, checkpoint, checkpoint_file=CHECKPOINT_FILE):
+    """
+    Record an endpoint's harvest checkpoint.
+
+    The file is written to a temporary name and renamed over the old one,
+    so an interrupted run never leaves a half-written checkpoint.
+
+    Args:
+        endpoint (str): The paginated endpoint.
+        checkpoint (int or dict): The newest match id harvested, or an unfinished walk (see load_checkpoints).
+        checkpoint_file (str): The JSON file holding the checkpoints.
+    """
+    with checkpoint_lock:
+        checkpoints = load_checkpoints(checkpoint_file)
+        checkpoints[endpoint] = checkpoint
+        tmp_path = checkpoint_file + ".tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump(checkpoints, f, indent=2)
+        os.replace(tmp_path, checkpoint_file)
+
+def harvest_matches(endpoint, session=None, base_url=BASE_URL, checkpoint_file=CHECKPOINT_FILE,
+                    max_pages=MAX_PAGES):
+    """
+    Fetch the matches that are newer than the endpoint's checkpoint.
+
+    Pages are walked backwards with the less_than_match_id cursor until a
+    page reaches the checkpoint, the API runs out of matches or max_pages
+    pages have been read. A walk stopped by max_pages is recorded with its
+    cursor, and the next harvest finishes it before fetching newer matches.
+
+    The new checkpoint is put in pending_checkpoints rather than saved: the
+    caller saves it with save_checkpoint once the matches are written out.
+    Nothing is pending after a failed request, so a failure or a lost
+    output file never leaves a gap behind the checkpoint.
+
+    Args:
+        endpoint (str): The paginated endpoint, e.g. "proMatches".
+        session (requests.Session): Optional session to reuse pooled connections.
+        base_url (str): The API root, overridable to point at another server.
+        checkpoint_file (str): The JSON file holding the checkpoints.
+        max_pages (int): The maximum number of pages to read.
+
+    Returns:
+        list: The new matches, newest first, or None if nothing could be fetched.
+    """
+    checkpoint = load_checkpoints(checkpoint_file).get(endpoint)
+    if isinstance(checkpoint, dict):
+        # An earlier harvest stopped at max_pages; carry on walking down from where it stopped
+        last_seen, cursor, newest = checkpoint["last_seen"], checkpoint["cursor"], checkpoint["newest"]
+        logging.info(f"Resuming {endpoint} below match {cursor} down to match {last_seen}")
+    else:
+        last_seen, cursor, newest = checkpoint, None, None
+    matches = []
+    failed = False
+    capped = False
+
+    for _ in range(max_pages):
+        params = {"less_than_match_id": cursor} if cursor else None
+        page = get_data(endpoint, session, base_url, params)
+        if page is None:
+            failed = True
+            break
+        if not page:
+            break
+
+        new_matches = [m for m in page if last_seen is None or m["match_id"] > last_seen]
+        matches.extend(new_matches)
+        if len(new_matches) < len(page):
+            # Reached matches harvested by an earlier run
+            break
+        cursor = min(m["match_id"] for m in page)
+    else:
+        if last_seen is not None:
+            capped = True
+            logging.warning(f"Stopped {endpoint} after {max_pages} pages before reaching match {last_seen}; "
+                            f"the next harvest resumes below match {cursor}")
+
+    logging.info(f"Harvested {len(matches)} new matches from {endpoint}")
+    if failed:
+        logging.error(f"Harvest of {endpoint} was interrupted; checkpoint left at {checkpoint}")
+        return matches or None
+    if matches and newest is None:
+        newest = max(m["match_id"] for m in matches)
+    if newest is not None:
+        with checkpoint_lock:
+            pending_checkpoints[endpoint] = (
+                {"last_seen": last_seen, "cursor": cursor, "newest": newest} if capped else newest
+            )
+    return matches
+
 def save_to_csv(data, filename):
     """
     Save the fetched data to a CSV file in the specified directory.
@@ -48,12 +436,14 @@ def save_to_csv(data, filename):
     Args:
         data (list): The list of data to save.
         filename (str): The name of the file to save the data to.
+
+    Returns:
+        str: The path of the written file, or None if nothing was written.
     """
     if data:
         try:
-            # Specify the full path to save the CSV in the desired directory
-            folder_path = r'C:\Users\kaur6\Downloads\BuildProject-ECommerce\Datasets\\'
-            file_path = folder_path + filename  # Combine the folder path and filename
+            # Save the CSV in the configured output folder
+            file_path = os.path.join(OUTPUT_ROOT, filename)
 
             # Convert the data to a pandas DataFrame
             df = pd.DataFrame(data)
@@ -61,10 +451,101 @@ def save_to_csv(data, filename):
             # Save the DataFrame as a CSV file
             df.to_csv(file_path, index=False, encoding='utf-8')
             logging.info(f"Saved {len(df)} records to {file_path}")
+            return file_path
         except Exception as e:
             logging.error(f"Error occurred while saving data to {filename}: {e}")
     else:
         logging.warning(f"No data to save for {filename}")
+    return None
+
+def dropped_fields(source_type, target_type, path):
+    """List the nested struct fields of source_type that casting to target_type drops, as dotted paths."""
+    if pa.types.is_struct(source_type) and pa.types.is_struct(target_type):
+        target_names = {target_type.field(i).name for i in range(target_type.num_fields)}
+        dropped = []
+        for i in range(source_type.num_fields):
+            field = source_type.field(i)
+            if field.name in target_names:
+                dropped += dropped_fields(field.type, target_type.field(field.name).type, f"{path}.{field.name}")
+            else:
+                dropped.append(f"{path}.{field.name}")
+        return dropped
+    if pa.types.is_list(source_type) and pa.types.is_list(target_type):
+        return dropped_fields(source_type.value_type, target_type.value_type, f"{path}[]")
+    return []
+
+def conform_to_schema(table, schema):
+    """
+    Reshape a batch to the file's schema: missing columns become nulls, new
+    columns and new nested struct fields are dropped and the rest are cast to
+    the file's types.
+    """
+    extra = set(table.column_names) - set(schema.names)
+    if extra:
+        logging.warning(f"Dropping columns not in the first batch: {sorted(extra)}")
+    nested = [path for field in schema if field.name in table.column_names
+              for path in dropped_fields(table.schema.field(field.name).type, field.type, field.name)]
+    if nested:
+        logging.warning(f"Dropping nested fields not in the first batch: {sorted(nested)}")
+    columns = [
+        table.column(field.name).cast(field.type) if field.name in table.column_names
+        else pa.nulls(len(table), field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+def save_to_parquet(data, endpoint, output_root=None, fetch_date=None):
+    """
+    Save the fetched records as a compressed Parquet file, partitioned by
+    endpoint and fetch date (<root>/parquet/endpoint=<name>/fetch_date=<date>/).
+
+    Records are converted and written PARQUET_BATCH_SIZE at a time, so only
+    one batch is held in columnar form. Nested objects and lists keep their
+    structure as Arrow struct and list columns instead of being flattened to
+    text. The schema comes from the first batch; columns that are empty there
+    are stored as strings.
+
+    Args:
+        data (list): The list of records to save.
+        endpoint (str): The endpoint the records came from.
+        output_root (str): The root folder, OUTPUT_ROOT by default.
+        fetch_date (str): The partition date (YYYY-MM-DD), today by default.
+
+    Returns:
+        str: The path of the written file, or None if nothing was written.
+    """
+    if not data:
+        logging.warning(f"No data to save for {endpoint}")
+        return None
+
+    records = data if isinstance(data, list) else [data]
+    fetch_date = fetch_date or datetime.now().strftime('%Y-%m-%d')
+    folder = os.path.join(output_root or OUTPUT_ROOT, "parquet", f"endpoint={endpoint}", f"fetch_date={fetch_date}")
+    file_path = os.path.join(folder, f"part-{datetime.now().strftime('%H%M%S%f')}.parquet")
+
+    writer = None
+    try:
+        os.makedirs(folder, exist_ok=True)
+        for start in range(0, len(records), PARQUET_BATCH_SIZE):
+            table = pa.Table.from_pylist(records[start:start + PARQUET_BATCH_SIZE])
+            if writer is None:
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ])
+                writer = pq.ParquetWriter(file_path, schema, compression=PARQUET_COMPRESSION)
+            writer.write_table(conform_to_schema(table, writer.schema))
+        writer.close()
+        logging.info(f"Saved {len(records)} records to {file_path}")
+        return file_path
+    except Exception as e:
+        logging.error(f"Error occurred while saving {endpoint} data to Parquet: {e}")
+        if writer is not None:
+            writer.close()
+        # Closing the writer leaves a valid file holding only the earlier batches
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return None
 
 # Dictionary of endpoints and their corresponding CSV filenames
 endpoints = {
@@ -75,20 +556,65 @@ endpoints = {
     "leagues": "leagues.csv"
 }
 
+# Function to fetch several endpoints concurrently
+async def fetch_all(endpoint_names, max_concurrency=MAX_CONCURRENCY, base_url=BASE_URL):
+    """
+    Fetch all given endpoints at the same time over one pooled session.
+
+    Each request runs get_data in a worker thread, and a semaphore keeps at
+    most max_concurrency requests in flight, so the total time is close to
+    the slowest endpoint rather than the sum of all of them. Paginated match
+    endpoints are harvested incrementally with harvest_matches.
+
+    Args:
+        endpoint_names (iterable): The API endpoints to fetch.
+        max_concurrency (int): The maximum number of requests in flight.
+        base_url (str): The API root, overridable to point at another server.
+
+    Returns:
+        dict: The JSON data (or None on failure) keyed by endpoint.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    with create_session(max_concurrency) as session:
+        async def fetch(endpoint):
+            async with semaphore:
+                logging.info(f"Fetching data from {endpoint}...")
+                if endpoint in PAGINATED_ENDPOINTS:
+                    return endpoint, await asyncio.to_thread(harvest_matches, endpoint, session, base_url)
+                return endpoint, await asyncio.to_thread(get_data, endpoint, session, base_url)
+
+        results = await asyncio.gather(*(fetch(endpoint) for endpoint in endpoint_names))
+    return dict(results)
+
 # Main function to fetch data from all endpoints and save it to CSV
 def main():
     """
     Main function to fetch data from multiple OpenDota API endpoints
-    and save the data to corresponding CSV files.
+    concurrently and save the data in each of the OUTPUT_FORMATS. A harvested
+    endpoint's checkpoint is only saved once every format was written.
     """
-    for endpoint, filename in endpoints.items():
-        logging.info(f"Fetching data from {endpoint}...")
+    start = time.perf_counter()
+    results = asyncio.run(fetch_all(endpoints))
+    logging.info(f"Fetched {len(results)} endpoints in {time.perf_counter() - start:.2f}s")
+    logging.info(f"Response cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated, "
+                 f"{cache_stats['misses']} misses")
+    logging.info("Request metrics:\n" + format_metrics())
 
-        # Fetch data from the API
-        data = get_data(endpoint)
+    for endpoint, filename in endpoints.items():
+        saved = []
+        if "parquet" in OUTPUT_FORMATS:
+            saved.append(save_to_parquet(results[endpoint], endpoint))
+        if "csv" in OUTPUT_FORMATS:
+            # Save the fetched data to a CSV file
+            saved.append(save_to_csv(results[endpoint], filename))
 
-        # Save the fetched data to a CSV file
-        save_to_csv(data, filename)
+        if endpoint in pending_checkpoints:
+            checkpoint = pending_checkpoints.pop(endpoint)
+            if results[endpoint] and None in saved:
+                logging.error(f"Not all {endpoint} output was written; its checkpoint is not advanced")
+            else:
+                save_checkpoint(endpoint, checkpoint)
 
 # Run the main function
 if __name__ == "__main__":
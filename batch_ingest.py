@@ -0,0 +1,119 @@
+import sys
+import os
+import glob
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import mysql.connector
+
+# Importing script also sets up the shared NiFi log file
+import script
+
+# Connection and load settings of the current pool worker, set once per process
+_worker_conn = None
+_worker_settings = {}
+
+
+def _init_worker(db_url, db_user, db_password, db, settings):
+    """Open the single MySQL connection this pool worker uses for all of its files."""
+    global _worker_conn, _worker_settings
+    _worker_settings = settings
+    _worker_conn = mysql.connector.connect(
+        host=db_url,
+        user=db_user,
+        password=db_password,
+        database=db,
+        allow_local_infile=(settings.get("mode") == "infile")
+    )
+
+
+def _load_file(csv_file):
+    """Load one CSV file on the worker's connection and return its summary entry."""
+    table_name = script.table_name_for(csv_file)
+    start = time.perf_counter()
+    try:
+        rows, _ = script.load_csv(_worker_conn, csv_file, table_name, **_worker_settings)
+        error = None
+    except Exception as e:
+        logging.error(f"Error occurred while loading {csv_file}: {str(e)}")
+        logging.exception("Exception details:")
+        rows, error = 0, str(e)
+    return {"table": table_name, "file": csv_file, "rows": rows,
+            "seconds": time.perf_counter() - start, "error": error}
+
+
+def collect_csv_files(paths):
+    """Expand directories into the CSV files they contain, keeping explicit files as given."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.csv"))))
+        else:
+            files.append(path)
+    return files
+
+
+def load_files(csv_files, db_url, db_user, db_password, db, max_workers=None, **settings):
+    """
+    Load several CSV files at the same time on a bounded process pool.
+
+    Each worker process holds one MySQL connection and loads its files with
+    script.load_csv() using the given keyword settings (mode, upsert, ...).
+    Returns a summary dict keyed by table name with the rows loaded, seconds
+    taken and any error per table.
+    """
+    max_workers = min(max_workers or os.cpu_count() or 1, max(len(csv_files), 1))
+
+    summary = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(db_url, db_user, db_password, db, settings)) as pool:
+        futures = [pool.submit(_load_file, csv_file) for csv_file in csv_files]
+        for future in as_completed(futures):
+            result = future.result()
+            entry = summary.setdefault(result["table"], {"rows": 0, "seconds": 0.0, "errors": []})
+            entry["rows"] += result["rows"]
+            entry["seconds"] += result["seconds"]
+            if result["error"]:
+                entry["errors"].append(f"{result['file']}: {result['error']}")
+
+    logging.info(f"Batch load of {len(csv_files)} file(s) finished: {summary}")
+    return summary
+
+
+def format_summary(summary):
+    """Render the per-table summary as a plain-text table."""
+    lines = [f"{'table':<20} {'rows':>10} {'seconds':>9}  errors"]
+    for table, entry in sorted(summary.items()):
+        lines.append(f"{table:<20} {entry['rows']:>10} {entry['seconds']:>9.2f}  {len(entry['errors'])}")
+        lines.extend(f"    {error}" for error in entry["errors"])
+    return "\n".join(lines)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Load several CSV files into MySQL in parallel.")
+    parser.add_argument("paths", nargs="+", help="CSV files and/or directories of CSV files.")
+    parser.add_argument("--db-url", required=True)
+    parser.add_argument("--db-user", required=True)
+    parser.add_argument("--db-password", required=True)
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Maximum worker processes (default: number of CPUs).")
+    script.add_load_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    csv_files = collect_csv_files(args.paths)
+    start = time.perf_counter()
+    summary = load_files(csv_files, args.db_url, args.db_user, args.db_password, args.db,
+                         args.workers, **script.load_options(args))
+    print(format_summary(summary))
+    print(f"Loaded {len(csv_files)} file(s) in {time.perf_counter() - start:.2f}s")
+    if any(entry["errors"] for entry in summary.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
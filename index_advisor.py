@@ -0,0 +1,229 @@
+import os
+import re
+import sys
+import ast
+import json
+import hashlib
+import logging
+import argparse
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+import config
+
+# Files holding the dashboard's queries
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD_FILE = os.path.join(BASE_DIR, "dashboard.py")
+QUERIES_FILE = os.path.join(BASE_DIR, "sql-queries.txt")
+
+# Table the dashboard queries are advised for
+FACT_TABLE = "fact_order_items"
+
+# Most columns in one advised index; wider queries get an index on their leading columns
+MAX_INDEX_COLUMNS = 6
+
+# Words that can follow a table name without being its alias
+SQL_KEYWORDS = {"WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "GROUP", "ORDER", "ON", "AS", "LIMIT", "UNION"}
+
+
+def strip_comments(sql):
+    """Remove -- comments and surrounding whitespace from a query."""
+    return re.sub(r"--[^\n]*", "", sql).strip().rstrip(";").strip()
+
+
+def dashboard_queries(path=DASHBOARD_FILE):
+    """
+    Return (label, sql) for every query string assigned to a query* variable in dashboard.py.
+    The file is parsed, not imported, because importing it starts the Streamlit app.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    queries = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant)
+                and isinstance(node.value.value, str)):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id.startswith("query"):
+                    queries.append((f"dashboard.py:{target.id} (line {node.lineno})", node.value.value))
+    return queries
+
+
+def file_queries(path=QUERIES_FILE):
+    """Return (label, sql) for every statement in sql-queries.txt, labelled by its leading comment."""
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    queries = []
+    for number, statement in enumerate(content.split(";\n"), start=1):
+        comment = re.match(r"\s*--\s*(.*)", statement)
+        label = f"sql-queries.txt #{number}" + (f" ({comment.group(1).strip()})" if comment else "")
+        queries.append((label, statement))
+    return queries
+
+
+def workload(table=FACT_TABLE):
+    """Collect the distinct dashboard queries that read the given table."""
+    queries, seen = [], set()
+    for label, sql in dashboard_queries() + file_queries():
+        sql = strip_comments(sql)
+        key = " ".join(sql.split()).lower()
+        if sql and key not in seen and re.search(rf"\b{table}\b", sql):
+            seen.add(key)
+            queries.append((label, sql))
+    return queries
+
+
+def referenced_columns(sql, table, columns):
+    """
+    Return the table's columns a query uses, in index order: WHERE columns first,
+    then join (ON) columns, then the remaining ones in order of appearance.
+    Columns qualified with the table's alias count, as do unqualified names.
+    """
+    aliases = {table}
+    for match in re.finditer(rf"\b{table}\b(?:\s+(?:AS\s+)?(\w+))?", sql, re.IGNORECASE):
+        if match.group(1) and match.group(1).upper() not in SQL_KEYWORDS:
+            aliases.add(match.group(1))
+
+    def used_in(fragment):
+        found = []
+        for match in re.finditer(r"(?:(\w+)\.)?\b(\w+)\b", fragment):
+            qualifier, name = match.groups()
+            if name in columns and (qualifier is None or qualifier in aliases) and name not in found:
+                found.append(name)
+        return found
+
+    where = " ".join(re.findall(r"\bWHERE\b(.*?)(?=\bGROUP\b|\bORDER\b|\)|$)", sql, re.IGNORECASE | re.DOTALL))
+    joins = " ".join(re.findall(r"\bON\b(.*?)(?=\bJOIN\b|\bWHERE\b|\bGROUP\b|\bORDER\b|$)", sql, re.IGNORECASE | re.DOTALL))
+    ordered = []
+    for name in used_in(where) + used_in(joins) + used_in(sql):
+        if name not in ordered:
+            ordered.append(name)
+    return ordered
+
+
+def candidate_indexes(queries, table, columns):
+    """One covering index per query, dropping any that is a prefix of another candidate."""
+    candidates = []
+    for _, sql in queries:
+        index_columns = tuple(referenced_columns(sql, table, columns)[:MAX_INDEX_COLUMNS])
+        if index_columns and index_columns not in candidates:
+            candidates.append(index_columns)
+    return [candidate for candidate in candidates
+            if not any(other != candidate and other[:len(candidate)] == candidate for other in candidates)]
+
+
+def index_name(index_columns):
+    """Stable name for an advised index, derived from its columns."""
+    return "ix_advised_" + hashlib.sha1(",".join(index_columns).encode("utf-8")).hexdigest()[:12]
+
+
+def explain(connection, sql):
+    """Return (estimated cost, index names used) from EXPLAIN FORMAT=JSON."""
+    plan = json.loads(connection.exec_driver_sql(f"EXPLAIN FORMAT=JSON {sql}").scalar())
+    used = set()
+
+    def collect(node):
+        if isinstance(node, dict):
+            if isinstance(node.get("key"), str):
+                used.add(node["key"])
+            for value in node.values():
+                collect(value)
+        elif isinstance(node, list):
+            for value in node:
+                collect(value)
+
+    collect(plan)
+    cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost")
+    return (float(cost) if cost is not None else None), used
+
+
+def explain_or_skip(connection, label, sql):
+    """explain() a query, or log a warning and return None if EXPLAIN fails."""
+    try:
+        return explain(connection, sql)
+    except (SQLAlchemyError, ValueError) as e:
+        logging.warning(f"Could not explain {label}; it is left out of the advice: {e}")
+        return None
+
+
+def advise_indexes(engine, table=FACT_TABLE):
+    """
+    Create covering indexes on a fact table for the dashboard's queries.
+
+    Each query's fact columns become one candidate index (filters, then join keys,
+    then the other columns it reads). Candidates are created, every query is explained
+    before and after, and candidates no plan uses are dropped again. table may be a
+    shadow copy of fact_order_items; the queries are pointed at it. A query that
+    cannot be explained is skipped and reported with no cost.
+    Returns a list of (label, cost before, cost after) and the indexes kept.
+    """
+    queries = [(label, re.sub(rf"\b{FACT_TABLE}\b", table, sql)) for label, sql in workload()]
+    with engine.connect() as connection:
+        columns = set(connection.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = :table
+        """), {"table": table}).scalars())
+        existing = set(connection.execute(text("""
+            SELECT DISTINCT index_name FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = :table
+        """), {"table": table}).scalars())
+
+        connection.exec_driver_sql(f"ANALYZE TABLE {table}")
+        before, explained = dict.fromkeys(label for label, _ in queries), []
+        for label, sql in queries:
+            result = explain_or_skip(connection, label, sql)
+            if result is not None:
+                before[label] = result[0]
+                explained.append((label, sql))
+
+        created = {}
+        for index_columns in candidate_indexes(explained, table, columns):
+            name = index_name(index_columns)
+            if name not in existing:
+                connection.exec_driver_sql(f"CREATE INDEX {name} ON {table} ({', '.join(index_columns)})")
+            created[name] = index_columns
+        connection.exec_driver_sql(f"ANALYZE TABLE {table}")
+
+        after, used = dict.fromkeys(before), set()
+        for label, sql in explained:
+            result = explain_or_skip(connection, label, sql)
+            if result is not None:
+                after[label], keys = result
+                used |= keys
+        for name in set(created) - used:
+            connection.exec_driver_sql(f"DROP INDEX {name} ON {table}")
+            logging.info(f"Dropped advised index {name} {created.pop(name)}: no dashboard query uses it.")
+        connection.commit()
+
+    for name, index_columns in created.items():
+        logging.info(f"Advised index {name} on {table} ({', '.join(index_columns)}).")
+    report = [(label, before[label], after[label]) for label, _ in queries]
+    return report, created
+
+
+def format_report(report, created):
+    """Render each query's estimated cost before and after indexing, and the indexes kept."""
+    def cost(value):
+        return "n/a" if value is None else f"{value:.1f}"
+
+    lines = [f"{'query':<60} {'before':>14} {'after':>14}"]
+    for label, before, after in report:
+        lines.append(f"{label[:60]:<60} {cost(before):>14} {cost(after):>14}")
+    for name, index_columns in created.items():
+        lines.append(f"{name}: {', '.join(index_columns)}")
+    return "\n".join(lines)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Create indexes on the fact table for the dashboard's queries.")
+    parser.add_argument("--table", default=FACT_TABLE, help="Fact table (or a copy of it) to index.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    engine = create_engine(f"mysql+mysqlconnector://{config.USERNAME}:{config.PASSWORD}@{config.HOST}/{config.DATABASE}")
+    print(format_report(*advise_indexes(engine, args.table)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import sys
+import os
+import time
+import logging
+import argparse
+import threading
+import socketserver
+from mysql.connector import pooling
+
+# Importing script also sets up the shared NiFi log file
+import script
+
+# Sub-folders of the spool directory that finished files are moved into
+PROCESSED_DIR = "processed"
+FAILED_DIR = "failed"
+
+
+class IngestWorker:
+    """
+    Resident loader that keeps pandas imported and a pooled MySQL connection open,
+    so each CSV costs only its own load instead of a new interpreter and connection.
+    """
+
+    def __init__(self, db_url, db_user, db_password, db, pool_size=2, **options):
+        # Keyword arguments accepted by script.load_csv(), e.g. mode or upsert
+        self.options = options
+        self.pool = pooling.MySQLConnectionPool(
+            pool_name="ingest_worker",
+            pool_size=pool_size,
+            host=db_url,
+            user=db_user,
+            password=db_password,
+            database=db,
+            allow_local_infile=(options.get("mode") == "infile")
+        )
+        # The pool raises instead of waiting when every connection is in use, so
+        # loads beyond the pool size (e.g. more socket clients) wait here for one
+        self.free_connections = threading.BoundedSemaphore(pool_size)
+        logging.info(f"Ingest worker started with a pool of {pool_size} connection(s).")
+
+    def load(self, csv_file):
+        """Load one CSV file into the table named after it. Returns (table, rows, seconds)."""
+        table_name = script.table_name_for(csv_file)
+        logging.info(f"Processing file: {csv_file}, Target Table: {table_name}")
+
+        # Closing a pooled connection hands it back to the pool
+        with self.free_connections:
+            conn = self.pool.get_connection()
+            try:
+                rows, elapsed = script.load_csv(conn, csv_file, table_name, **self.options)
+            finally:
+                conn.close()
+
+        logging.info(f"Successfully processed {csv_file} and loaded data into {table_name}.")
+        return table_name, rows, elapsed
+
+    def try_load(self, csv_file):
+        """Load a file and turn the result into a one-line status message."""
+        try:
+            table_name, rows, elapsed = self.load(csv_file)
+            return True, f"OK {table_name} {rows} {elapsed:.3f}"
+        except Exception as e:
+            logging.error(f"Error occurred while loading {csv_file}: {str(e)}")
+            logging.exception("Exception details:")
+            return False, f"ERROR {csv_file} {str(e)}"
+
+    def serve_stdin(self, stdin=sys.stdin, stdout=sys.stdout):
+        """Read one file path per line from stdin and answer with one status line each."""
+        for line in stdin:
+            csv_file = line.strip()
+            if not csv_file:
+                continue
+            _, message = self.try_load(csv_file)
+            stdout.write(message + "\n")
+            stdout.flush()
+
+    def serve_spool(self, spool_dir, poll_interval=1.0):
+        """
+        Watch a spool directory and load every CSV dropped into it.
+
+        Hidden files are skipped so writers can drop a dot-prefixed file and
+        rename it once complete. Loaded files are moved to processed/ and
+        files that fail to load to failed/.
+        """
+        for folder in (PROCESSED_DIR, FAILED_DIR):
+            os.makedirs(os.path.join(spool_dir, folder), exist_ok=True)
+
+        logging.info(f"Watching spool directory {spool_dir}")
+        while True:
+            names = sorted(name for name in os.listdir(spool_dir)
+                           if name.lower().endswith(".csv") and not name.startswith("."))
+            for name in names:
+                csv_file = os.path.join(spool_dir, name)
+                ok, _ = self.try_load(csv_file)
+                target = PROCESSED_DIR if ok else FAILED_DIR
+                os.replace(csv_file, os.path.join(spool_dir, target, name))
+            if not names:
+                time.sleep(poll_interval)
+
+    def serve_socket(self, host="127.0.0.1", port=9099):
+        """
+        Accept file paths over a local TCP socket, one per line, replying with a status line.
+        Each client gets a thread; at most pool_size files load at once and the rest wait.
+        """
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    csv_file = line.decode("utf-8").strip()
+                    if not csv_file:
+                        continue
+                    _, message = worker.try_load(csv_file)
+                    self.wfile.write((message + "\n").encode("utf-8"))
+
+        with socketserver.ThreadingTCPServer((host, port), Handler) as server:
+            logging.info(f"Ingest worker listening on {host}:{port}")
+            server.serve_forever()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Resident worker that loads CSV files into MySQL.")
+    parser.add_argument("db_url")
+    parser.add_argument("db_user")
+    parser.add_argument("db_password")
+    parser.add_argument("db")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--spool", metavar="DIR", help="Load CSV files dropped into this directory.")
+    source.add_argument("--port", type=int, help="Accept file paths on this localhost TCP port.")
+    parser.add_argument("--pool-size", type=int, default=2,
+                        help="Pooled MySQL connections (socket mode serves one file per connection).")
+    script.add_load_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    worker = IngestWorker(args.db_url, args.db_user, args.db_password, args.db, args.pool_size,
+                          **script.load_options(args))
+    if args.spool:
+        worker.serve_spool(args.spool)
+    elif args.port:
+        worker.serve_socket(port=args.port)
+    else:
+        # Default: read file paths from stdin until it is closed
+        worker.serve_stdin()
+
+
+if __name__ == "__main__":
+    main()
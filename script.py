@@ -1,4 +1,9 @@
 import sys
+import csv
+import time
+import hashlib
+import warnings
+import argparse
 import pandas as pd
 import mysql.connector
 import numpy as np
@@ -12,65 +17,604 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 log_file_path = os.path.join(script_dir, 'nifi_script_error.log')
 logging.basicConfig(filename=log_file_path, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-try:
-    # Read command-line arguments
-    csv_file = sys.argv[1]
-    db_url = sys.argv[2]
-    db_user = sys.argv[3]
-    db_password = sys.argv[4]
-    db = sys.argv[5]
-
-    # Extract table name from the file name (use os.path.basename for correct path handling)
-    table_name = os.path.splitext(os.path.basename(csv_file))[0].lower()
-
-    logging.info(f"Processing file: {csv_file}, Target Table: {table_name}")
-
-    # Connect to MySQL
-    conn = mysql.connector.connect(
-        host=db_url,
-        user=db_user,
-        password=db_password,
-        database=db
-    )
-    cursor = conn.cursor()
+# Load modes supported by the script
+#   row    - one INSERT per row (the original behaviour, kept for comparison)
+#   batch  - multi-row INSERTs sent in batches of --batch-size rows
+#   infile - LOAD DATA LOCAL INFILE straight from the CSV file
+LOAD_MODES = ("row", "batch", "infile")
+DEFAULT_BATCH_SIZE = 5000
 
-    # Read CSV file
-    df = pd.read_csv(csv_file)
-
-    # Infer column types
-    def infer_sql_type(dtype):
-        if pd.api.types.is_integer_dtype(dtype):
-            return "INT"
-        elif pd.api.types.is_float_dtype(dtype):
-            return "FLOAT"
-        elif pd.api.types.is_bool_dtype(dtype):
-            return "BOOLEAN"
-        else:
-            return "TEXT"
+# Rows read to infer the table schema when the file is streamed in chunks
+DEFAULT_SAMPLE_ROWS = 10000
+
+# Table recording the content hash of every file that has been loaded
+MANIFEST_TABLE = "load_manifest"
+
+# Upsert keys of the tables that hold several rows per ID column; other tables
+# are upserted on their first *ID column
+UPSERT_KEYS = {
+    "order_items": ["OrderID", "OrderItemID"],
+    "payments": ["OrderID", "PaymentSequential"],
+    "feedbacks": ["FeedbackID", "OrderID"],
+}
+
+# Signed integer types from smallest to largest, with their bit width
+INTEGER_TYPES = [("TINYINT", 8), ("SMALLINT", 16), ("MEDIUMINT", 24), ("INT", 32), ("BIGINT", 64)]
+
+# Inferred widths and ranges are multiplied by this factor, since a sample
+# rarely contains the longest string or largest number of the whole file
+HEADROOM = 2
+
+# Most decimal places stored as DECIMAL; floats with more are stored as DOUBLE
+MAX_DECIMAL_SCALE = 4
+
+# Smallest DECIMAL precision used, so a sample of small amounts still leaves room
+MIN_DECIMAL_PRECISION = 10
+
+# Longest VARCHAR inferred; wider text columns are stored as TEXT
+MAX_VARCHAR_WIDTH = 1024
+
+# Smallest types used when the schema comes from the first rows of a streamed file
+# rather than the whole file: an increasing ID or a later, longer text value would
+# otherwise overflow a type sized from the first rows part-way through the load
+SAMPLED_MIN_INTEGER_TYPE = "INT"
+SAMPLED_MIN_VARCHAR_WIDTH = 256
+
+# Strings that start like a date (2017-10-02, 10/2/2017, ...) are tried as DATETIME
+DATE_PATTERN = r"^\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}"
+
+# Dates MySQL reads as they are; LOAD DATA converts the other layouts below with
+# STR_TO_DATE, given as (Python format, MySQL format)
+ISO_DATE_PATTERN = r"^\d{4}-\d{1,2}-\d{1,2}([ T]\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?)?$"
+DATE_FORMATS = [
+    ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%i:%s"),
+    ("%m/%d/%Y %H:%M", "%m/%d/%Y %H:%i"),
+    ("%m/%d/%Y", "%m/%d/%Y"),
+    ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%i:%s"),
+    ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%i"),
+    ("%d/%m/%Y", "%d/%m/%Y"),
+    ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%i:%s"),
+    ("%d.%m.%Y", "%d.%m.%Y"),
+]
+
+
+def integer_sql_type(low, high, complete=True):
+    """
+    Return the smallest signed integer type holding [low, high] with headroom.
+    When the values are only a sample of the file, nothing smaller than
+    SAMPLED_MIN_INTEGER_TYPE is used.
+    """
+    low, high = int(low) * HEADROOM, int(high) * HEADROOM
+    names = [name for name, _ in INTEGER_TYPES]
+    first = 0 if complete else names.index(SAMPLED_MIN_INTEGER_TYPE)
+    for name, bits in INTEGER_TYPES[first:]:
+        if -2 ** (bits - 1) <= low and high < 2 ** (bits - 1):
+            return name
+    return "BIGINT"
+
+
+def decimal_scale(values):
+    """Return the fewest decimal places that represent every value, or None if too many."""
+    for scale in range(MAX_DECIMAL_SCALE + 1):
+        if (np.abs(values - np.round(values, scale)) < 1e-9).all():
+            return scale
+    return None
+
+
+def looks_like_datetime(values):
+    """Check whether every sampled string is a date or timestamp."""
+    if not values.str.match(DATE_PATTERN).all():
+        return False
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return pd.to_datetime(values, errors="coerce").notna().all()
+
+
+def varchar_sql_type(values, complete=True):
+    """
+    Return a bounded VARCHAR wide enough for the sampled strings, or TEXT.
+    When the values are only a sample of the file, the width starts at SAMPLED_MIN_VARCHAR_WIDTH.
+    """
+    width = 16 if complete else SAMPLED_MIN_VARCHAR_WIDTH
+    while width < values.str.len().max() * HEADROOM:
+        width *= 2
+    return f"VARCHAR({width})" if width <= MAX_VARCHAR_WIDTH else "TEXT"
+
+
+# Infer column types
+def infer_sql_type(series, complete=True):
+    """
+    Infer a column's SQL type from the sampled values.
+
+    Integers get the smallest fitting integer type, floats with few decimal
+    places become DECIMAL (or an integer type when they are whole numbers that
+    pandas read as float because of missing values), date strings become
+    DATETIME and other strings a bounded VARCHAR. complete=False means the values
+    are only the first rows of the file: integer and VARCHAR types are sized
+    generously, and floats are stored as DOUBLE, since later rows may have more
+    decimal places than the sample and would be rounded by an INT or DECIMAL.
+    """
+    dtype = series.dtype
+    values = series.dropna()
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    elif values.empty:
+        # Nothing to size the column from
+        return "DOUBLE" if pd.api.types.is_numeric_dtype(dtype) else "TEXT"
+    elif pd.api.types.is_integer_dtype(dtype):
+        return integer_sql_type(values.min(), values.max(), complete)
+    elif pd.api.types.is_float_dtype(dtype):
+        values = values.to_numpy()
+        if not complete or not np.isfinite(values).all():
+            return "DOUBLE"
+        scale = decimal_scale(values)
+        if scale is None:
+            return "DOUBLE"
+        elif scale == 0 and np.abs(values).max() < 2 ** 62:
+            return integer_sql_type(values.min(), values.max(), complete)
+        digits = len(str(int(np.abs(values).max() * HEADROOM)))
+        return f"DECIMAL({min(max(digits + scale, MIN_DECIMAL_PRECISION), 65)},{scale})"
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        return "DATETIME"
+    else:
+        values = values.astype(str)
+        if looks_like_datetime(values):
+            return "DATETIME"
+        return varchar_sql_type(values, complete)
+
+
+def is_indexable(sql_type):
+    """Whole TEXT columns cannot be indexed without a prefix length."""
+    return sql_type not in ("TEXT", "DOUBLE", "BOOLEAN")
 
-    # Generate CREATE TABLE statement
-    columns = ", ".join([f"{col} {infer_sql_type(df[col].dtype)}" for col in df.columns])
-    create_table_sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns});"
 
+def detect_key_columns(columns):
+    """Pick the table's ID column: the first column whose name ends with 'ID'."""
+    for col in columns:
+        if col.lower().endswith("id"):
+            return [col]
+    return []
+
+
+def upsert_key_columns(table_name, columns):
+    """Pick the upsert key: the table's UPSERT_KEYS entry, else its ID column."""
+    key_columns = UPSERT_KEYS.get(table_name)
+    if key_columns and all(col in columns for col in key_columns):
+        return list(key_columns)
+    return detect_key_columns(columns)
+
+
+def check_unique_key(df, key_columns, source):
+    """
+    Raise a ValueError if rows of df share the upsert key: ON DUPLICATE KEY UPDATE
+    (or LOAD DATA REPLACE) would silently merge them into one row.
+    """
+    duplicated = df.duplicated(subset=key_columns, keep=False)
+    if duplicated.any():
+        examples = df.loc[duplicated, key_columns].drop_duplicates().head(5)
+        raise ValueError(f"{source} has {int(duplicated.sum())} rows sharing the upsert key "
+                         f"({', '.join(key_columns)}), e.g. {examples.to_dict('records')}; "
+                         "pass key columns that identify a row with --key.")
+
+
+def create_table(cursor, table_name, df, key_columns=None, complete=False):
+    """
+    Create the target table from the DataFrame's columns if it does not exist yet.
+
+    Column types are inferred from the DataFrame's values. The primary key is
+    the upsert key columns, or the table's ID column when df holds the whole
+    file (complete=True) and that column is unique and never empty. Every other
+    ID column gets a secondary index so the raw tables can be joined on it.
+
+    Returns a dict mapping each column to its SQL type.
+    """
+    column_types = {col: infer_sql_type(df[col], complete) for col in df.columns}
+
+    key_columns = key_columns or []
+    for col in key_columns:
+        if not is_indexable(column_types[col]):
+            column_types[col] = "VARCHAR(255)"
+
+    primary_key = list(key_columns)
+    if not primary_key and complete:
+        own_id = detect_key_columns(df.columns)
+        if own_id and is_indexable(column_types[own_id[0]]) and df[own_id[0]].notna().all() \
+                and df[own_id[0]].is_unique:
+            primary_key = own_id
+
+    definitions = [f"{col} {sql_type}" for col, sql_type in column_types.items()]
+    if primary_key:
+        definitions.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+    for col, sql_type in column_types.items():
+        if col.lower().endswith("id") and col not in primary_key and is_indexable(sql_type):
+            definitions.append(f"KEY ix_{table_name}_{col.lower()} ({col})")
+
+    columns = ", ".join(definitions)
+    create_table_sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns});"
     cursor.execute(create_table_sql)
-    conn.commit()
+    return column_types
 
-    # Insert data into table
-    columns = ", ".join(df.columns)
-    placeholders = ", ".join(["%s"] * len(df.columns))
-    insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+
+def ensure_unique_key(cursor, table_name, key_columns):
+    """Add the upsert unique key to a table that was created before upserts were used."""
+    cursor.execute(
+        "SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) "
+        "FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 0 "
+        "GROUP BY INDEX_NAME",
+        (table_name,)
+    )
+    wanted = ",".join(key_columns).lower()
+    if any(columns.lower() == wanted for _, columns in cursor.fetchall()):
+        return
+
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND DATA_TYPE IN ('text', 'mediumtext', 'longtext')",
+        (table_name,)
+    )
+    text_columns = {name.lower() for (name,) in cursor.fetchall()}
+
+    # Rows loaded before upserts were used may already repeat a key; the unique key
+    # cannot be added until they are removed (NULL keys never clash)
+    keys = ", ".join(key_columns)
+    not_null = " AND ".join(f"{col} IS NOT NULL" for col in key_columns)
+    cursor.execute(
+        f"SELECT {keys}, COUNT(*) FROM {table_name} WHERE {not_null} "
+        f"GROUP BY {keys} HAVING COUNT(*) > 1 LIMIT 5"
+    )
+    duplicates = cursor.fetchall()
+    if duplicates:
+        examples = "; ".join(f"({', '.join(map(str, row[:-1]))}) x{row[-1]}" for row in duplicates)
+        raise ValueError(f"Cannot upsert into {table_name}: it already holds rows with the same ({keys}), "
+                         f"e.g. {examples}. Remove the duplicates before loading with --upsert.")
+
+    for col in key_columns:
+        if col.lower() in text_columns:
+            cursor.execute(f"ALTER TABLE {table_name} MODIFY COLUMN {col} VARCHAR(255)")
+    cursor.execute(f"ALTER TABLE {table_name} ADD UNIQUE KEY uq_{table_name}_key ({', '.join(key_columns)})")
+    logging.info(f"Added unique key ({', '.join(key_columns)}) to {table_name} for upserts.")
+
+
+def build_insert_sql(table_name, columns, key_columns=None):
+    """Build the parameterised INSERT, turned into an upsert when key columns are given."""
+    placeholders = ", ".join(["%s"] * len(columns))
+    insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+    if key_columns:
+        updates = [f"{col} = VALUES({col})" for col in columns if col not in key_columns]
+        # A table made only of key columns still needs a no-op update clause
+        updates = updates or [f"{key_columns[0]} = {key_columns[0]}"]
+        insert_sql += " ON DUPLICATE KEY UPDATE " + ", ".join(updates)
+    return insert_sql
+
+
+def insert_rows(cursor, table_name, df, key_columns=None):
+    """Insert the DataFrame one row at a time. Returns the number of rows sent."""
+    insert_sql = build_insert_sql(table_name, list(df.columns), key_columns)
 
     for _, row in df.iterrows():
-        row = [None if (isinstance(x, float) and np.isnan(x)) else x for x in row]
+        row = [None if (isinstance(x, float) and np.isnan(x)) or x is pd.NaT else x for x in row]
         cursor.execute(insert_sql, tuple(row))
+    return len(df)
+
+
+def batch_insert_rows(cursor, table_name, df, batch_size=DEFAULT_BATCH_SIZE, key_columns=None):
+    """
+    Insert the DataFrame using multi-row INSERT statements.
+
+    mysql-connector rewrites an executemany() on a plain INSERT into a single
+    multi-row INSERT, so each batch costs one round trip instead of one per row.
+    NaN values are replaced by None for the whole frame at once instead of per value.
+    """
+    insert_sql = build_insert_sql(table_name, list(df.columns), key_columns)
+
+    df = df.astype(object).where(pd.notna(df), None)
+    rows = list(df.itertuples(index=False, name=None))
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(insert_sql, rows[start:start + batch_size])
+    return len(rows)
+
+
+def mysql_date_format(values):
+    """
+    Return the STR_TO_DATE format every sampled date string matches, or None for
+    ISO dates, which MySQL reads as they are.
+    """
+    values = values.dropna().astype(str)
+    if values.str.match(ISO_DATE_PATTERN).all():
+        return None
+    for python_format, mysql_format in DATE_FORMATS:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            if pd.to_datetime(values, format=python_format, errors="coerce").notna().all():
+                return mysql_format
+    raise ValueError(f"Dates such as {values.iloc[0]!r} have no format LOAD DATA can parse; "
+                     "use the batch or row mode.")
+
+
+def line_terminator(csv_file):
+    """Return the SQL escape for the file's line ending: '\\r\\n' for CRLF files, else '\\n'."""
+    with open(csv_file, "rb") as f:
+        first_line = f.readline()
+    return "\\r\\n" if first_line.endswith(b"\r\n") else "\\n"
+
+
+def csv_row_count(csv_file):
+    """Count the file's data rows (quoted fields may span lines), without the header."""
+    with open(csv_file, newline="", encoding="utf-8") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def load_data_infile(cursor, table_name, csv_file, columns, replace=False, date_formats=None):
+    """
+    Bulk-load the CSV file with LOAD DATA LOCAL INFILE. Returns the number of rows loaded.
+
+    Empty fields are loaded as NULL, matching how pandas reads them as NaN, and
+    backslashes are loaded as they are (ESCAPED BY ''), since CSV writers do not
+    escape them. date_formats maps DATETIME columns to the MySQL format of their
+    strings, which are converted with STR_TO_DATE instead of relying on MySQL
+    reading 10/2/2017. With replace=True rows that hit the unique key replace the
+    existing row; MySQL counts those twice, so the file's own row count is returned.
+    """
+    date_formats = date_formats or {}
+    variables = ", ".join(f"@v{i}" for i in range(len(columns)))
+    assignments = []
+    for i, col in enumerate(columns):
+        value = f"NULLIF(@v{i}, '')"
+        if col in date_formats:
+            value = f"STR_TO_DATE({value}, '{date_formats[col]}')"
+        assignments.append(f"{col} = {value}")
+    load_sql = (
+        f"LOAD DATA LOCAL INFILE %s {'REPLACE ' if replace else ''}INTO TABLE {table_name} "
+        "CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+        f"LINES TERMINATED BY '{line_terminator(csv_file)}' IGNORE 1 LINES "
+        f"({variables}) SET {', '.join(assignments)}"
+    )
+    cursor.execute(load_sql, (os.path.abspath(csv_file),))
+    return csv_row_count(csv_file) if replace else cursor.rowcount
+
+
+def insert_chunk(cursor, table_name, df, mode, batch_size=DEFAULT_BATCH_SIZE, key_columns=None):
+    """Insert one DataFrame (a whole file or a single chunk) with a row-based load mode."""
+    if mode == "row":
+        return insert_rows(cursor, table_name, df, key_columns)
+    elif mode == "batch":
+        return batch_insert_rows(cursor, table_name, df, batch_size, key_columns)
+    else:
+        raise ValueError(f"Unknown load mode: {mode}")
+
+
+def file_hash(csv_file, block_size=1 << 20):
+    """Return the SHA-256 hex digest of the file's contents."""
+    digest = hashlib.sha256()
+    with open(csv_file, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ensure_manifest(cursor):
+    """
+    Create the load manifest table if it does not exist yet. Entries are keyed on
+    (FileHash, TableName), so the same file can be loaded into several tables;
+    manifests created with FileHash alone as the key are migrated.
+    """
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            FileHash CHAR(64) NOT NULL,
+            TableName VARCHAR(64) NOT NULL,
+            FileName VARCHAR(255),
+            RowCount INT,
+            LoadedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (FileHash, TableName)
+        );
+    """)
+    cursor.execute(
+        "SELECT GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = 'PRIMARY'",
+        (MANIFEST_TABLE,)
+    )
+    (primary_key,) = cursor.fetchone()
+    if primary_key and primary_key.lower() == "filehash":
+        cursor.execute(f"ALTER TABLE {MANIFEST_TABLE} MODIFY COLUMN TableName VARCHAR(64) NOT NULL, "
+                       "DROP PRIMARY KEY, ADD PRIMARY KEY (FileHash, TableName)")
+        logging.info(f"Migrated {MANIFEST_TABLE} to be keyed on (FileHash, TableName).")
+
+
+def already_loaded(cursor, digest, table_name):
+    """Check the manifest for a file hash loaded into the table (a primary key lookup)."""
+    cursor.execute(f"SELECT 1 FROM {MANIFEST_TABLE} WHERE FileHash = %s AND TableName = %s",
+                   (digest, table_name))
+    return cursor.fetchone() is not None
+
+
+def record_load(cursor, digest, csv_file, table_name, rows):
+    """Record a finished load in the manifest."""
+    cursor.execute(
+        f"INSERT INTO {MANIFEST_TABLE} (FileHash, TableName, FileName, RowCount) VALUES (%s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE FileName = VALUES(FileName), "
+        "RowCount = VALUES(RowCount), LoadedAt = CURRENT_TIMESTAMP",
+        (digest, table_name, os.path.basename(csv_file), rows)
+    )
+
+
+def load_csv(conn, csv_file, table_name, mode="batch", batch_size=DEFAULT_BATCH_SIZE,
+             chunksize=None, sample_rows=DEFAULT_SAMPLE_ROWS, upsert=False, key_columns=None,
+             force=False):
+    """
+    Load a CSV file into the given table using the requested load mode.
+
+    When chunksize is set the file is streamed: the schema is inferred from the
+    first sample_rows rows, the table is created from that sample, and each chunk
+    is inserted as soon as it is read, so memory use does not grow with the file
+    size. LOAD DATA mode never needs more than the sample in memory. The rows of a
+    file are committed in one transaction with its manifest entry, so a load that
+    fails part-way leaves nothing behind and can simply be retried.
+
+    Every loaded file is recorded by content hash in the load manifest, and a file
+    whose hash is already there is skipped unless force is set. With upsert the
+    rows are written with INSERT ... ON DUPLICATE KEY UPDATE on the key columns
+    (see upsert_key_columns by default), so re-runs do not duplicate rows. The key
+    must be unique in the sample and in every chunk, or the load is refused.
+
+    Returns a tuple of (rows loaded, seconds spent loading) so callers can
+    compare throughput between modes on the same file.
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode: {mode}")
+
+    cursor = conn.cursor()
+    try:
+        ensure_manifest(cursor)
+        digest = file_hash(csv_file)
+        if not force and already_loaded(cursor, digest, table_name):
+            logging.info(f"Skipping {csv_file}: identical content was already loaded into {table_name}.")
+            return 0, 0.0
+
+        if chunksize or mode == "infile":
+            # Infer the schema from a sample instead of reading the whole file
+            sample = pd.read_csv(csv_file, nrows=sample_rows)
+            chunks = pd.read_csv(csv_file, chunksize=chunksize) if mode != "infile" else None
+            complete = False
+        else:
+            # Read CSV file
+            sample = pd.read_csv(csv_file)
+            chunks = [sample]
+            complete = True
+
+        if upsert:
+            key_columns = key_columns or upsert_key_columns(table_name, sample.columns)
+            if not key_columns:
+                raise ValueError(f"No ID column found in {csv_file} to upsert on; pass the key columns.")
+            check_unique_key(sample, key_columns, csv_file)
+        else:
+            key_columns = None
+
+        column_types = create_table(cursor, table_name, sample, key_columns, complete)
+        if key_columns:
+            ensure_unique_key(cursor, table_name, key_columns)
+        conn.commit()
+        columns = list(sample.columns)
+        datetime_columns = [col for col, sql_type in column_types.items() if sql_type == "DATETIME"]
+        date_formats = {}
+        if mode == "infile":
+            for col in datetime_columns:
+                date_format = mysql_date_format(sample[col])
+                if date_format:
+                    date_formats[col] = date_format
+        del sample
+
+        start = time.perf_counter()
+        if mode == "infile":
+            rows = load_data_infile(cursor, table_name, csv_file, columns, replace=bool(key_columns),
+                                    date_formats=date_formats)
+        else:
+            rows = 0
+            for chunk in chunks:
+                # Send dates as datetimes so MySQL does not depend on the CSV's date format
+                for col in datetime_columns:
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore")
+                        chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+                if key_columns and not complete:
+                    check_unique_key(chunk, key_columns, csv_file)
+                rows += insert_chunk(cursor, table_name, chunk, mode, batch_size, key_columns)
+        # The manifest entry is committed together with the rows of the file
+        record_load(cursor, digest, csv_file, table_name, rows)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    rate = rows / elapsed if elapsed > 0 else float("inf")
+    logging.info(f"Loaded {rows} rows into {table_name} in {elapsed:.2f}s ({rate:.0f} rows/sec, mode={mode}).")
+    return rows, elapsed
+
+
+def table_name_for(csv_file):
+    """Extract table name from the file name (use os.path.basename for correct path handling)."""
+    return os.path.splitext(os.path.basename(csv_file))[0].lower()
+
+
+def add_load_arguments(parser):
+    """Add the optional load settings shared by every ingest entry point."""
+    parser.add_argument("--mode", choices=LOAD_MODES, default="batch",
+                        help="How rows are sent to MySQL (default: batch).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Rows per multi-row INSERT in batch mode.")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows instead of reading it whole.")
+    parser.add_argument("--sample-rows", type=int, default=DEFAULT_SAMPLE_ROWS,
+                        help="Rows used to infer the table schema when streaming.")
+    parser.add_argument("--upsert", action="store_true",
+                        help="Update rows that already exist instead of appending duplicates.")
+    parser.add_argument("--key", dest="key_columns", action="append", default=None, metavar="COLUMN",
+                        help="Key column for --upsert (repeatable; default: the table's known key, "
+                             "else the first *ID column).")
+    parser.add_argument("--force", action="store_true",
+                        help="Load the file even if the manifest says it was already loaded.")
+
+
+def load_options(args):
+    """Collect the parsed load settings into keyword arguments for load_csv()."""
+    return {
+        "mode": args.mode,
+        "batch_size": args.batch_size,
+        "chunksize": args.chunksize,
+        "sample_rows": args.sample_rows,
+        "upsert": args.upsert,
+        "key_columns": args.key_columns,
+        "force": args.force,
+    }
+
+
+def parse_args(argv):
+    """Parse the positional NiFi arguments plus the optional load settings."""
+    parser = argparse.ArgumentParser(description="Load a CSV flowfile into a MySQL table.")
+    parser.add_argument("csv_file")
+    parser.add_argument("db_url")
+    parser.add_argument("db_user")
+    parser.add_argument("db_password")
+    parser.add_argument("db")
+    add_load_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    try:
+        # Read command-line arguments
+        args = parse_args(sys.argv[1:] if argv is None else argv)
+        csv_file = args.csv_file
+
+        table_name = table_name_for(csv_file)
+
+        logging.info(f"Processing file: {csv_file}, Target Table: {table_name}")
+
+        # Connect to MySQL
+        conn = mysql.connector.connect(
+            host=args.db_url,
+            user=args.db_user,
+            password=args.db_password,
+            database=args.db,
+            allow_local_infile=(args.mode == "infile")
+        )
+
+        rows, elapsed = load_csv(conn, csv_file, table_name, **load_options(args))
+        conn.close()
+
+        rate = rows / elapsed if elapsed > 0 else float("inf")
+        sys.stdout.write(f"{table_name}: {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/sec, mode={args.mode})\n")
+        logging.info(f"Successfully processed {csv_file} and loaded data into {table_name}.")
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+    except Exception as e:
+        logging.error(f"Error occurred: {str(e)}")
+        logging.exception("Exception details:")
+        sys.stderr.write(f"Error occurred: {str(e)}\n")
 
-    logging.info(f"Successfully processed {csv_file} and loaded data into {table_name}.")
 
-except Exception as e:
-    logging.error(f"Error occurred: {str(e)}")
-    logging.exception("Exception details:")
-    sys.stderr.write(f"Error occurred: {str(e)}\n")
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,49 @@
-import subprocess  # Importing subprocess to run external scripts
 import pandas as pd
 from sqlalchemy import create_engine
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
+import sys
+import hashlib
+import inspect
 import logging
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 import config
+import transforming_tables
+import index_advisor
 
 # Configure logging
 logging.basicConfig(filename="C:/Users/kaur6/Downloads/BuildProject-ECommerce/Ecommerce/transformation_log.log", level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
 
 # Function to call the existing transformation script
-def run_transformation_script():
+def run_transformation_script(engine, incremental=False):
     """
-    Runs the existing transformation script using subprocess.
-    Ensure that the script 'transforming_tables.py' exists in the specified location.
-    The script will be executed as a separate process.
+    Runs the transform stage of 'transforming_tables.py' in this process.
+    The given engine is passed on, so the transform stage shares its connection pool
+    instead of starting a second interpreter with its own connections.
     """
-    subprocess.run(["python", "C:\\Users\\kaur6\\Downloads\\BuildProject-ECommerce\\Ecommerce\\transforming_tables.py"], check=True)
+    transforming_tables.run_transform_stage(engine, incremental=incremental)
+
+# Days of order dates covered by each chunk of the partitioned fact build
+FACT_CHUNK_DAYS = 30
+
+# Chunks of the fact build inserted at the same time, each on its own pooled connection
+FACT_WORKERS = 4
+
+# Table recording the committed chunks of the fact build, so a failed build can resume
+FACT_PROGRESS_TABLE = "fact_build_progress"
+
+# Star schema build steps run at the same time, each on its own pooled connection
+BUILD_WORKERS = 4
+
+# Suffix of the shadow tables that rebuilt tables are created under before being swapped in
+SHADOW_SUFFIX = "_new"
+
+# Table recording the source fingerprint each dimension was last built from
+DIM_STATE_TABLE = "dim_build_state"
 
 # Database connection details
 USERNAME = config.USERNAME       # Username for the database
@@ -26,204 +52,151 @@ HOST = config.HOST       # Database host (localhost for local development)
 DATABASE = config.DATABASE   # Name of the database being accessed
 
 # Function to create a user dimension table with a primary key
-def create_dim_users(engine):
+def create_dim_users(engine, table_name='dim_users'):
     """
     This function creates a dimension table called 'dim_users' with a primary key on the 'UserID' column.
-    It first drops any existing 'dim_users' table, then creates a new table by selecting relevant 
-    columns from the 'transformed_users' table. 
+    The table is built under table_name (a shadow table during rebuilds) by selecting relevant
+    columns from the 'transformed_users' table, with the primary key declared in the CREATE itself. 
     """
     with engine.begin() as connection:  # Ensures auto-commit and transaction management
-        # Drop the 'fact_order_items' table if it exists (though it's not part of the 'dim_users' creation, its for for cleanup)
-        connection.execute(text("DROP TABLE IF EXISTS fact_order_items;"))
-        
-        # Drop the existing 'dim_users' table if it exists
-        connection.execute(text(""" 
-            DROP TABLE IF EXISTS dim_users;
+        # Drop any existing table of this name (e.g. a shadow table left by an interrupted rebuild)
+        connection.execute(text(f""" 
+            DROP TABLE IF EXISTS {table_name};
         """))
 
         # Create the 'dim_users' table by selecting columns from the 'transformed_users' table
         # UserID, UserZIPCode, UserCity, and UserState are selected from 'transformed_users'
-        connection.execute(text(""" 
-            CREATE TABLE dim_users 
+        connection.execute(text(f""" 
+            CREATE TABLE {table_name} (UserID VARCHAR(50) NOT NULL PRIMARY KEY)
             AS 
             SELECT UserID, UserZIPCode, UserCity, UserState 
             FROM transformed_users;
         """))
 
-        # Modify the UserID column to VARCHAR(50), ensuring it is of the correct type
-        connection.execute(text(""" 
-            ALTER TABLE dim_users MODIFY COLUMN UserID VARCHAR(50);
-        """))
-
-        # Add a primary key constraint to the 'UserID' column
-        connection.execute(text(""" 
-            ALTER TABLE dim_users ADD PRIMARY KEY (UserID);
-        """))
-
         # Print confirmation message
         print("Dimension Table 'dim_users' created.")
 
 
 # Function to create a feedbacks dimension table with a primary key
-def create_dim_feedbacks(engine):
+def create_dim_feedbacks(engine, table_name='dim_feedbacks'):
     """
     This function creates a dimension table called 'dim_feedbacks' with a primary key on the 'FeedbackID' column.
-    It first drops any existing 'dim_feedbacks' table, then creates a new table by selecting relevant 
-    columns from the 'transformed_feedbacks' table.
+    The table is built under table_name (a shadow table during rebuilds) by selecting relevant
+    columns from the 'transformed_feedbacks' table, with the primary key declared in the CREATE itself.
     """
     with engine.begin() as connection:  # Ensures auto-commit and transaction management
-        # Drop the existing 'dim_feedbacks' table if it exists to avoid conflicts
-        connection.execute(text(""" 
-            DROP TABLE IF EXISTS dim_feedbacks;
+        # Drop any existing table of this name (e.g. a shadow table left by an interrupted rebuild)
+        connection.execute(text(f""" 
+            DROP TABLE IF EXISTS {table_name};
         """))
 
         # Create the 'dim_feedbacks' table by selecting columns from the 'transformed_feedbacks' table
         # The selected columns include FeedbackID, FeedbackScore, FeedbackFormSentDate, and FeedbackAnswerDate
-        connection.execute(text(""" 
-            CREATE TABLE dim_feedbacks 
+        connection.execute(text(f""" 
+            CREATE TABLE {table_name} (FeedbackID VARCHAR(50) NOT NULL PRIMARY KEY)
             AS 
             SELECT FeedbackID, FeedbackScore, FeedbackFormSentDate, FeedbackAnswerDate 
             FROM transformed_feedbacks;
         """))
 
-        # Modify the FeedbackID column to ensure it is of type VARCHAR(50)
-        connection.execute(text(""" 
-            ALTER TABLE dim_feedbacks MODIFY COLUMN FeedbackID VARCHAR(50);
-        """))
-
-        # Add a primary key constraint to the 'FeedbackID' column
-        connection.execute(text(""" 
-            ALTER TABLE dim_feedbacks ADD PRIMARY KEY (FeedbackID);
-        """))
-
         # Print confirmation message once the table is created successfully
         print("Dimension Table 'dim_feedbacks' created.")
 
 
 # Function to create a payments dimension table with a primary key
-def create_dim_payments(engine):
+def create_dim_payments(engine, table_name='dim_payments'):
     """
     This function creates a dimension table called 'dim_payments' with a primary key on the 'PaymentID' column.
-    It first drops any existing 'dim_payments' table, then creates a new table by selecting relevant 
-    columns from the 'transformed_payments' table.
+    The table is built under table_name (a shadow table during rebuilds) by selecting relevant
+    columns from the 'transformed_payments' table, with the primary key declared in the CREATE itself.
     """
     with engine.begin() as connection:  # Ensures auto-commit and transaction management
-        # Drop the existing 'dim_payments' table if it exists to avoid conflicts
-        connection.execute(text(""" 
-            DROP TABLE IF EXISTS dim_payments;
+        # Drop any existing table of this name (e.g. a shadow table left by an interrupted rebuild)
+        connection.execute(text(f""" 
+            DROP TABLE IF EXISTS {table_name};
         """))
 
         # Create the 'dim_payments' table by selecting columns from the 'transformed_payments' table
         # The selected columns include PaymentID, PaymentValue, PaymentInstallments, PaymentSequential, and PaymentType
-        connection.execute(text(""" 
-            CREATE TABLE dim_payments 
+        connection.execute(text(f""" 
+            CREATE TABLE {table_name} (PaymentID VARCHAR(50) NOT NULL PRIMARY KEY)
             AS 
             SELECT PaymentID, PaymentValue, PaymentInstallments, PaymentSequential, PaymentType 
             FROM transformed_payments;
         """))
 
-        # Modify the PaymentID column to ensure it is of type VARCHAR(50)
-        connection.execute(text(""" 
-            ALTER TABLE dim_payments MODIFY COLUMN PaymentID VARCHAR(50);
-        """))
-
-        # Add a primary key constraint to the 'PaymentID' column
-        connection.execute(text(""" 
-            ALTER TABLE dim_payments ADD PRIMARY KEY (PaymentID);
-        """))
-
         # Print confirmation message once the table is created successfully
         print("Dimension Table 'dim_payments' created.")
 
 
 # Function to create a products dimension table with a primary key
-def create_dim_products(engine):
+def create_dim_products(engine, table_name='dim_products'):
     """
     This function creates a dimension table called 'dim_products' with a primary key on the 'ProductID' column.
-    It first drops any existing 'dim_products' table, then creates a new table by selecting relevant 
-    columns from the 'transformed_products' table.
+    The table is built under table_name (a shadow table during rebuilds) by selecting relevant
+    columns from the 'transformed_products' table, with the primary key declared in the CREATE itself.
     """
     with engine.begin() as connection:  # Ensures auto-commit and transaction management
-        # Drop the existing 'dim_products' table if it exists to avoid conflicts
-        connection.execute(text(""" 
-            DROP TABLE IF EXISTS dim_products;
+        # Drop any existing table of this name (e.g. a shadow table left by an interrupted rebuild)
+        connection.execute(text(f""" 
+            DROP TABLE IF EXISTS {table_name};
         """))
 
         # Create the 'dim_products' table by selecting columns from the 'transformed_products' table
         # The selected columns include ProductID, ProductCategory, ProductNameLength, ProductDescriptionLength, 
         # ProductPhotosQuantity, ProductWeightInGrams, ProductLengthInCm, ProductHeightInCm, and ProductWidthInCm
-        connection.execute(text(""" 
-            CREATE TABLE dim_products 
+        connection.execute(text(f""" 
+            CREATE TABLE {table_name} (ProductID VARCHAR(50) NOT NULL PRIMARY KEY)
             AS 
             SELECT ProductID, ProductCategory, ProductNameLength, ProductDescriptionLength, ProductPhotosQuantity, 
                    ProductWeightInGrams, ProductLengthInCm, ProductHeightInCm, ProductWidthInCm
             FROM transformed_products;
         """))
 
-        # Modify the ProductID column to ensure it is of type VARCHAR(50)
-        connection.execute(text(""" 
-            ALTER TABLE dim_products MODIFY COLUMN ProductID VARCHAR(50);
-        """))
-
-        # Add a primary key constraint to the 'ProductID' column
-        connection.execute(text(""" 
-            ALTER TABLE dim_products ADD PRIMARY KEY (ProductID);
-        """))
-
         # Print confirmation message once the table is created successfully
         print("Dimension Table 'dim_products' created.")
 
 
 # Function to create a sellers dimension table with a primary key
-def create_dim_sellers(engine):
+def create_dim_sellers(engine, table_name='dim_sellers'):
     """
     This function creates a dimension table called 'dim_sellers' with a primary key on the 'SellerID' column.
-    It first drops any existing 'dim_sellers' table, then creates a new table by selecting relevant 
-    columns from the 'transformed_sellers' table.
+    The table is built under table_name (a shadow table during rebuilds) by selecting relevant
+    columns from the 'transformed_sellers' table, with the primary key declared in the CREATE itself.
     """
     with engine.begin() as connection:  # Ensures auto-commit and transaction management
-        # Drop the existing 'dim_sellers' table if it exists to avoid conflicts
-        connection.execute(text(""" 
-            DROP TABLE IF EXISTS dim_sellers;
+        # Drop any existing table of this name (e.g. a shadow table left by an interrupted rebuild)
+        connection.execute(text(f""" 
+            DROP TABLE IF EXISTS {table_name};
         """))
 
         # Create the 'dim_sellers' table by selecting columns from the 'transformed_sellers' table
         # The selected columns include SellerID, SellerCity, SellerState, and SellerZIPCode
-        connection.execute(text(""" 
-            CREATE TABLE dim_sellers 
+        connection.execute(text(f""" 
+            CREATE TABLE {table_name} (SellerID VARCHAR(50) NOT NULL PRIMARY KEY)
             AS 
             SELECT SellerID, SellerCity, SellerState, SellerZIPCode
             FROM transformed_sellers;
         """))
 
-        # Modify the SellerID column to ensure it is of type VARCHAR(50)
-        connection.execute(text(""" 
-            ALTER TABLE dim_sellers MODIFY COLUMN SellerID VARCHAR(50);
-        """))
-
-        # Add a primary key constraint to the 'SellerID' column
-        connection.execute(text(""" 
-            ALTER TABLE dim_sellers ADD PRIMARY KEY (SellerID);
-        """))
-
         # Print confirmation message once the table is created successfully
         print("Dimension Table 'dim_sellers' created.")
 
 
 # Function to create and populate dim_date table
-def create_dim_date(engine):
+def create_dim_date(engine, table_name='dim_date'):
     """
     This function creates and populates a 'dim_date' table with columns for date-related information.
-    It first drops the existing table, then creates a new schema and populates it with date data.
+    It first drops any table named table_name, then creates a new schema and populates it with date data.
     The date range is from '2016-04-09' to '2018-10-17' (modifiable).
     """
     with engine.begin() as connection:  # Ensures auto-commit and transaction management
-        # Drop the 'dim_date' table if it already exists to avoid conflicts
-        connection.execute(text("DROP TABLE IF EXISTS dim_date;"))
+        # Drop the table if it already exists to avoid conflicts
+        connection.execute(text(f"DROP TABLE IF EXISTS {table_name};"))
 
         # Create the 'dim_date' table with various columns related to date information
-        connection.execute(text(""" 
-            CREATE TABLE dim_date (
+        connection.execute(text(f""" 
+            CREATE TABLE {table_name} (
                 DateKey INT PRIMARY KEY,         
                 Date DATETIME,                   
                 Day VARCHAR(2),                 
@@ -266,21 +239,21 @@ def create_dim_date(engine):
     # Insert the populated DataFrame into the 'dim_date' table in MySQL
     # The 'if_exists="append"' option ensures that the data is appended to the existing table
     # The 'method="multi"' option speeds up the insertion by using batch insertions
-    df.to_sql("dim_date", con=engine, if_exists="append", index=False, method="multi")
+    df.to_sql(table_name, con=engine, if_exists="append", index=False, method="multi")
 
     # Print confirmation message once the data is successfully inserted
     print("Dimension table 'dim_date' populated successfully.")
 
 
 # Function to create and populate dim_time table
-def create_dim_time(engine):
+def create_dim_time(engine, table_name='dim_time'):
     with engine.begin() as connection:
         # Drop table if it exists
-        connection.execute(text("DROP TABLE IF EXISTS dim_time;"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {table_name};"))
 
         # Create table schema
-        connection.execute(text(""" 
-            CREATE TABLE dim_time (
+        connection.execute(text(f""" 
+            CREATE TABLE {table_name} (
                 TimeKey INT PRIMARY KEY, 
                 AM_PM VARCHAR(2),          
                 Hour INT,                  
@@ -313,17 +286,19 @@ def create_dim_time(engine):
     })
 
     # Insert into MySQL
-    df.to_sql("dim_time", con=engine, if_exists="append", index=False, method="multi")
+    df.to_sql(table_name, con=engine, if_exists="append", index=False, method="multi")
 
     print("Dimension table 'dim_time' populated successfully.")
 
 
-def create_fact_order_items(engine):
+def create_fact_order_items(engine, table_name='fact_order_items'):
     with engine.begin() as connection:
-        
+        # Drop a table of this name left by an interrupted build
+        connection.execute(text(f"DROP TABLE IF EXISTS {table_name};"))
+
         # Creating the fact_order_items table with necessary fields and foreign key constraints
-        connection.execute(text("""
-            CREATE TABLE fact_order_items (
+        connection.execute(text(f"""
+            CREATE TABLE {table_name} (
                 OrderID VARCHAR(50),
                 UserID VARCHAR(50),
                 ProductID VARCHAR(50),
@@ -370,128 +345,354 @@ def create_fact_order_items(engine):
 
 
 
-def insert_into_fact_order_items(engine):
-    if engine is None:
-        print("Cannot proceed: No database connection.")
-        return
-    
-    try:
-        with engine.begin() as connection:
-        
-            # Inserting data into fact_order_items table from transformed data sources
-            connection.execute(text("""
-                INSERT INTO fact_order_items (
-                    OrderID, UserID, ProductID, SellerID, PaymentID, FeedbackID, 
-                    OrderDateKey, OrderTimeKey, PaymentValue, UserState, 
-                    DeliveredDateKey, DeliveredTimeKey, DeliveryDelayCheck, DeliveryDelayDays,
-                    EstimatedDeliveryDateKey, EstimatedDeliveryTimeKey,
-                    OrderApprovedDateKey, OrderApprovedTimeKey, 
-                    OrderStatus, PickupDateKey, PickupTimeKey, 
-                    Quantity, ShippingDays
-                )
-                SELECT
-                    o.OrderID,
-                    o.UserID,
-                    oi.ProductID,
-                    oi.SellerID,
-                    p.PaymentID,
-                    f.FeedbackID,
-                    d1.DateKey AS OrderDateKey,
-                    t1.TimeKey AS OrderTimeKey,
-                    p.PaymentValue,
-                    u.UserState,
-                    d2.DateKey AS DeliveredDateKey,
-                    t2.TimeKey AS DeliveredTimeKey,
-                    CASE 
-                        WHEN d2.DateKey > d3.DateKey THEN 'TRUE' 
-                        ELSE 'FALSE' 
-                    END AS DeliveryDelayCheck,
-                    CASE 
-                        WHEN DATEDIFF(d2.DateKey, d3.DateKey) < 0 THEN 0 
-                        ELSE DATEDIFF(d2.DateKey, d3.DateKey) 
-                    END AS DeliveryDelayDays,
-                    d3.DateKey AS EstimatedDeliveryDateKey,
-                    t3.TimeKey AS EstimatedDeliveryTimeKey,
-                    d4.DateKey AS OrderApprovedDateKey,
-                    t4.TimeKey AS OrderApprovedTimeKey,
-                    o.OrderStatus,
-                    d5.DateKey AS PickupDateKey,
-                    t5.TimeKey AS PickupTimeKey,
-                    oi.Quantity,
-                    DATEDIFF(o.DeliveredDate, o.PickupDate) AS ShippingDays
-                FROM transformed_orders o
-                LEFT JOIN transformed_order_items oi ON o.OrderID = oi.OrderID
-                LEFT JOIN dim_users u ON o.UserID = u.UserID
-                LEFT JOIN dim_sellers s ON oi.SellerID = s.SellerID
-                LEFT JOIN dim_products pd ON oi.ProductID = pd.productID
-                LEFT JOIN dim_payments p ON o.OrderID = p.PaymentID
-                LEFT JOIN dim_feedbacks f ON o.FeedbackID = f.FeedbackID
-                LEFT JOIN dim_date d1 ON DATE(o.OrderDate) = DATE(d1.Date)
-                LEFT JOIN dim_time t1 ON HOUR(o.OrderDate) = t1.Hour AND MINUTE(o.OrderDate) = t1.Minute
-                LEFT JOIN dim_date d2 ON DATE(o.DeliveredDate) = DATE(d2.Date)
-                LEFT JOIN dim_time t2 ON HOUR(o.DeliveredDate) = t2.Hour AND MINUTE(o.DeliveredDate) = t2.Minute
-                LEFT JOIN dim_date d3 ON DATE(o.EstimatedDeliveryDate) = DATE(d3.Date)
-                LEFT JOIN dim_time t3 ON HOUR(o.EstimatedDeliveryDate) = t3.Hour AND MINUTE(o.EstimatedDeliveryDate) = t3.Minute
-                LEFT JOIN dim_date d4 ON DATE(o.OrderApprovedDate) = DATE(d4.Date)
-                LEFT JOIN dim_time t4 ON HOUR(o.OrderApprovedDate) = t4.Hour AND MINUTE(o.OrderApprovedDate) = t4.Minute
-                LEFT JOIN dim_date d5 ON DATE(o.PickupDate) = DATE(d5.Date)
-                LEFT JOIN dim_time t5 ON HOUR(o.PickupDate) = t5.Hour AND MINUTE(o.PickupDate) = t5.Minute;
-            """))
-            
-            # Fact table 'fact_order_items' populated successfully
-            print("Fact table 'fact_order_items' populated successfully.")
-    
-    except SQLAlchemyError as e:
-        # Error handling if insertion fails
-        print(f"Error inserting into 'fact_order_items': {e}")
-
-
-def main():
+def date_key_sql(column):
+    """
+    SQL for the YYYYMMDD DateKey of a DATETIME column, computed from the value itself
+    so the join to dim_date is a primary key lookup instead of a DATE() comparison.
+    """
+    return f"(YEAR({column}) * 10000 + MONTH({column}) * 100 + DAYOFMONTH({column}))"
+
+def time_key_sql(column):
+    """SQL for the HHMMSS TimeKey of a DATETIME column; dim_time has one row per minute, so seconds are 00."""
+    return f"(HOUR({column}) * 10000 + MINUTE({column}) * 100)"
+
+def fact_insert_sql(where=None, table_name='fact_order_items'):
+    """
+    Build the INSERT ... SELECT that fills table_name from the transformed tables
+    and dimensions, optionally restricted by a WHERE condition on transformed_orders (o).
+    The date and time keys are computed from the timestamps; joining the dimensions
+    on their primary keys only keeps keys that exist there.
+    """
+    where_clause = f"\n        WHERE {where}" if where else ""
+    return f"""
+        INSERT INTO {table_name} (
+            OrderID, UserID, ProductID, SellerID, PaymentID, FeedbackID, 
+            OrderDateKey, OrderTimeKey, PaymentValue, UserState, 
+            DeliveredDateKey, DeliveredTimeKey, DeliveryDelayCheck, DeliveryDelayDays,
+            EstimatedDeliveryDateKey, EstimatedDeliveryTimeKey,
+            OrderApprovedDateKey, OrderApprovedTimeKey, 
+            OrderStatus, PickupDateKey, PickupTimeKey, 
+            Quantity, ShippingDays
+        )
+        SELECT
+            o.OrderID,
+            o.UserID,
+            oi.ProductID,
+            oi.SellerID,
+            p.PaymentID,
+            f.FeedbackID,
+            d1.DateKey AS OrderDateKey,
+            t1.TimeKey AS OrderTimeKey,
+            p.PaymentValue,
+            u.UserState,
+            d2.DateKey AS DeliveredDateKey,
+            t2.TimeKey AS DeliveredTimeKey,
+            CASE 
+                WHEN d2.DateKey > d3.DateKey THEN 'TRUE' 
+                ELSE 'FALSE' 
+            END AS DeliveryDelayCheck,
+            CASE 
+                WHEN DATEDIFF(d2.DateKey, d3.DateKey) < 0 THEN 0 
+                ELSE DATEDIFF(d2.DateKey, d3.DateKey) 
+            END AS DeliveryDelayDays,
+            d3.DateKey AS EstimatedDeliveryDateKey,
+            t3.TimeKey AS EstimatedDeliveryTimeKey,
+            d4.DateKey AS OrderApprovedDateKey,
+            t4.TimeKey AS OrderApprovedTimeKey,
+            o.OrderStatus,
+            d5.DateKey AS PickupDateKey,
+            t5.TimeKey AS PickupTimeKey,
+            oi.Quantity,
+            DATEDIFF(o.DeliveredDate, o.PickupDate) AS ShippingDays
+        FROM transformed_orders o
+        LEFT JOIN transformed_order_items oi ON o.OrderID = oi.OrderID
+        LEFT JOIN dim_users u ON o.UserID = u.UserID
+        LEFT JOIN dim_sellers s ON oi.SellerID = s.SellerID
+        LEFT JOIN dim_products pd ON oi.ProductID = pd.productID
+        LEFT JOIN dim_payments p ON o.OrderID = p.PaymentID
+        LEFT JOIN dim_feedbacks f ON o.FeedbackID = f.FeedbackID
+        LEFT JOIN dim_date d1 ON d1.DateKey = {date_key_sql('o.OrderDate')}
+        LEFT JOIN dim_time t1 ON t1.TimeKey = {time_key_sql('o.OrderDate')}
+        LEFT JOIN dim_date d2 ON d2.DateKey = {date_key_sql('o.DeliveredDate')}
+        LEFT JOIN dim_time t2 ON t2.TimeKey = {time_key_sql('o.DeliveredDate')}
+        LEFT JOIN dim_date d3 ON d3.DateKey = {date_key_sql('o.EstimatedDeliveryDate')}
+        LEFT JOIN dim_time t3 ON t3.TimeKey = {time_key_sql('o.EstimatedDeliveryDate')}
+        LEFT JOIN dim_date d4 ON d4.DateKey = {date_key_sql('o.OrderApprovedDate')}
+        LEFT JOIN dim_time t4 ON t4.TimeKey = {time_key_sql('o.OrderApprovedDate')}
+        LEFT JOIN dim_date d5 ON d5.DateKey = {date_key_sql('o.PickupDate')}
+        LEFT JOIN dim_time t5 ON t5.TimeKey = {time_key_sql('o.PickupDate')}{where_clause};
+    """
+
+def fact_chunks(engine, chunk_days=FACT_CHUNK_DAYS):
+    """
+    Split transformed_orders into half-open OrderDate ranges of chunk_days days.
+    Returns a list of (label, WHERE condition, params); the last chunk holds orders without an OrderDate.
+    """
+    with engine.connect() as connection:
+        first, last = connection.execute(text("SELECT MIN(OrderDate), MAX(OrderDate) FROM transformed_orders")).one()
+
+    chunks = []
+    if first is not None:
+        start = pd.Timestamp(first).normalize()
+        while start <= pd.Timestamp(last):
+            end = start + pd.Timedelta(days=chunk_days)
+            chunks.append((start.strftime('%Y-%m-%d'), "o.OrderDate >= :start AND o.OrderDate < :end",
+                           {"start": start.to_pydatetime(), "end": end.to_pydatetime()}))
+            start = end
+    chunks.append(("NULL", "o.OrderDate IS NULL", {}))
+    return chunks
+
+def ensure_order_date_index(engine):
+    """Index transformed_orders.OrderDate so each chunk reads only its own date range."""
+    index_name = "ix_transformed_orders_OrderDate"
+    with engine.begin() as connection:
+        exists = connection.execute(text("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'transformed_orders' AND index_name = :index_name
+        """), {"index_name": index_name}).scalar()
+        if not exists:
+            connection.execute(text(f"CREATE INDEX {index_name} ON transformed_orders (OrderDate);"))
+
+def insert_fact_chunk(engine, table_name, label, where, params):
+    """Insert one chunk of fact rows and record it (with its date range) as done, in a single transaction."""
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        result = connection.execute(text(fact_insert_sql(where, table_name)), params)
+        connection.execute(text(f"INSERT INTO {FACT_PROGRESS_TABLE} (ChunkKey, ChunkStart, ChunkEnd, RowCount) "
+                                f"VALUES (:chunk, :start, :end, :rows)"),
+                           {"chunk": label, "start": params.get("start"), "end": params.get("end"),
+                            "rows": result.rowcount})
+    return result.rowcount, time.perf_counter() - start
+
+def insert_into_fact_order_items_chunked(engine, chunk_days=FACT_CHUNK_DAYS, max_workers=FACT_WORKERS, resume=False,
+                                         table_name='fact_order_items'):
+    """
+    Fill table_name in order-date chunks inserted concurrently on pooled connections.
+
+    Every chunk commits on its own together with its row (and date range) in the progress
+    table, so a failure only loses that chunk. With resume=True, chunks already recorded
+    are skipped; otherwise the progress table is recreated first (table_name must be empty).
+    A resume whose chunks do not line up with the recorded ones, because chunk_days or the
+    orders' date range changed, raises RuntimeError instead of inserting rows twice.
+    Raises RuntimeError naming the failed chunks once all the others have finished.
+    """
+    with engine.begin() as connection:
+        if not resume:
+            connection.execute(text(f"DROP TABLE IF EXISTS {FACT_PROGRESS_TABLE};"))
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {FACT_PROGRESS_TABLE} (
+                ChunkKey VARCHAR(32) PRIMARY KEY,
+                ChunkStart DATETIME,
+                ChunkEnd DATETIME,
+                RowCount INT,
+                FinishedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+        """))
+        done = {key: (chunk_start, chunk_end) for key, chunk_start, chunk_end in connection.execute(
+            text(f"SELECT ChunkKey, ChunkStart, ChunkEnd FROM {FACT_PROGRESS_TABLE}"))}
+
+    ensure_order_date_index(engine)
+    all_chunks = fact_chunks(engine, chunk_days)
+    ranges = {label: (params.get("start"), params.get("end")) for label, _, params in all_chunks}
+    mismatched = sorted(label for label, chunk_range in done.items() if ranges.get(label) != chunk_range)
+    if mismatched:
+        raise RuntimeError(f"Fact chunks {mismatched} were recorded with other date ranges than this build's; "
+                           f"resume with the --fact-chunk-days of the failed build, or rebuild without --resume-fact.")
+    chunks = [chunk for chunk in all_chunks if chunk[0] not in done]
+    logging.info(f"Inserting {len(chunks)} fact chunk(s) with {max_workers} worker(s); {len(done)} already done.")
+
+    start = time.perf_counter()
+    total_rows, failed = 0, []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(insert_fact_chunk, engine, table_name, *chunk): chunk[0] for chunk in chunks}
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                rows, elapsed = future.result()
+                total_rows += rows
+                logging.info(f"Fact chunk {label}: {rows} rows in {elapsed:.2f}s.")
+            except SQLAlchemyError as e:
+                failed.append(label)
+                logging.error(f"Fact chunk {label} failed: {e}")
+
+    if failed:
+        raise RuntimeError(f"Fact chunks failed: {sorted(failed)}; rerun with --resume-fact to repeat only these.")
+    logging.info(f"Inserted {total_rows} rows into {table_name} in {time.perf_counter() - start:.2f}s.")
+    print("Fact table 'fact_order_items' populated successfully.")
+
+def table_exists(connection, table_name):
+    """Check whether a table exists in the current database."""
+    return connection.execute(text("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = :table_name
+    """), {"table_name": table_name}).scalar() > 0
+
+def dimension_fingerprint(engine, build, source):
+    """
+    Fingerprint what a dimension is built from: the build function's code and, if it
+    has a source table, that table's row count and CHECKSUM TABLE value.
+    """
+    parts = [inspect.getsource(build)]
+    if source is not None:
+        parts += transforming_tables.table_checksums(engine, [source])
+    return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()
+
+def rebuild_dimension(engine, table_name, build, source):
+    """
+    Rebuild a dimension in a shadow table and swap it in, unless its source is unchanged
+    since the last build. Returns True if the dimension was rebuilt.
+    """
+    fingerprint = dimension_fingerprint(engine, build, source)
+    with engine.begin() as connection:
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {DIM_STATE_TABLE} (
+                TableName VARCHAR(64) PRIMARY KEY,
+                SourceFingerprint CHAR(64),
+                BuiltAt DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            );
+        """))
+        built_from = connection.execute(text(f"SELECT SourceFingerprint FROM {DIM_STATE_TABLE} WHERE TableName = :table"),
+                                        {"table": table_name}).scalar()
+        exists = table_exists(connection, table_name)
+    if exists and built_from == fingerprint:
+        logging.info(f"{table_name} is up to date with {source or 'its definition'}; skipping rebuild.")
+        return False
+
+    shadow_table = table_name + SHADOW_SUFFIX
+    build(engine, shadow_table)
+    # Foreign key checks are off for the swap so a dimension referenced by the current
+    # fact table can be replaced; the fact table is rebuilt against the new dimensions
+    transforming_tables.swap_in_table(engine, shadow_table, table_name, foreign_key_checks=False)
+    with engine.begin() as connection:
+        connection.execute(text(f"INSERT INTO {DIM_STATE_TABLE} (TableName, SourceFingerprint) VALUES (:table, :fingerprint) "
+                                f"ON DUPLICATE KEY UPDATE SourceFingerprint = VALUES(SourceFingerprint)"),
+                           {"table": table_name, "fingerprint": fingerprint})
+    logging.info(f"{table_name} rebuilt and swapped in.")
+    return True
+
+def fill_fact_order_items(engine, chunk_days=FACT_CHUNK_DAYS, max_workers=FACT_WORKERS, resume=False):
+    """Fill the shadow fact table in chunks."""
+    shadow_table = "fact_order_items" + SHADOW_SUFFIX
+    insert_into_fact_order_items_chunked(engine, chunk_days, max_workers, resume, table_name=shadow_table)
+
+def index_fact_order_items(engine):
+    """
+    Create the index advisor's covering indexes for the dashboard queries on the shadow
+    fact table, so the table is already indexed when it is swapped in, and report the costs.
+    """
+    report, created = index_advisor.advise_indexes(engine, "fact_order_items" + SHADOW_SUFFIX)
+    report_text = index_advisor.format_report(report, created)
+    logging.info(f"Index advisor report (estimated query cost before and after):\n{report_text}")
+    print(report_text)
+
+def publish_fact_order_items(engine):
+    """Swap the filled and indexed shadow fact table in as fact_order_items."""
+    transforming_tables.swap_in_table(engine, "fact_order_items" + SHADOW_SUFFIX, "fact_order_items",
+                                      foreign_key_checks=False)
+
+
+def run_build_step(engine, build, table, *_):
+    """Run one build step and return the row count of the table it fills (None if it fills none)."""
+    build(engine)
+    if table is None:
+        return None
+    with engine.connect() as connection:
+        return connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+def build_steps(engine, fact_chunk_days=FACT_CHUNK_DAYS, fact_workers=FACT_WORKERS):
+    """
+    Declare the star schema build graph: step name -> (function, dependency names).
+
+    The dimensions do not depend on each other; each is rebuilt in a shadow table and
+    swapped in (or skipped when its source is unchanged). The shadow fact table is
+    created once every dimension is in place, then filled, indexed for the dashboard's
+    queries and swapped in.
+    """
+    # Dimension -> (build function, source table)
+    dimensions = {
+        'dim_users': (create_dim_users, 'transformed_users'),
+        'dim_feedbacks': (create_dim_feedbacks, 'transformed_feedbacks'),
+        'dim_payments': (create_dim_payments, 'transformed_payments'),
+        'dim_products': (create_dim_products, 'transformed_products'),
+        'dim_sellers': (create_dim_sellers, 'transformed_sellers'),
+        'dim_date': (create_dim_date, None),
+        'dim_time': (create_dim_time, None),
+    }
+    create_fact = partial(create_fact_order_items, table_name="fact_order_items" + SHADOW_SUFFIX)
+    fill_fact = partial(fill_fact_order_items, chunk_days=fact_chunk_days, max_workers=fact_workers)
+
+    steps = {}
+    for table, (build, source) in dimensions.items():
+        rebuild = partial(rebuild_dimension, table_name=table, build=build, source=source)
+        steps[table] = (partial(run_build_step, engine, rebuild, table), [])
+    steps['create_fact_order_items'] = (partial(run_build_step, engine, create_fact, None),
+                                        list(dimensions))
+    steps['fact_order_items'] = (partial(run_build_step, engine, fill_fact, "fact_order_items" + SHADOW_SUFFIX),
+                                 ['create_fact_order_items'])
+    steps['fact_indexes'] = (partial(run_build_step, engine, index_fact_order_items, None), ['fact_order_items'])
+    steps['swap_fact_order_items'] = (partial(run_build_step, engine, publish_fact_order_items, 'fact_order_items'),
+                                      ['fact_indexes'])
+    return steps
+
+def format_build_report(steps, results, timings):
+    """Render each build step's time and row count, the wall time and the critical path."""
+    lines = [f"{'step':<26} {'seconds':>9} {'rows':>10}"]
+    for name, (start, end) in sorted(timings.items(), key=lambda item: item[1][0]):
+        rows = "" if results[name] is None else results[name]
+        lines.append(f"{name:<26} {end - start:>9.2f} {rows:>10}")
+    wall = max(end for _, end in timings.values()) - min(start for start, _ in timings.values())
+    path, seconds = transforming_tables.critical_path(steps, timings)
+    lines.append(f"Wall time {wall:.2f}s; critical path {' -> '.join(path)} ({seconds:.2f}s)")
+    return "\n".join(lines)
+
+def build_star_schema(engine, fact_chunk_days=FACT_CHUNK_DAYS, fact_workers=FACT_WORKERS,
+                      max_workers=BUILD_WORKERS):
+    """Run the star schema build graph and return its report."""
+    steps = build_steps(engine, fact_chunk_days, fact_workers)
+    results, timings = transforming_tables.run_dag(steps, max_workers=max_workers)
+    return format_build_report(steps, results, timings)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build the star schema from the transformed tables.")
+    parser.add_argument("--resume-fact", action="store_true",
+                        help="Only finish the fact table build, skipping chunks that already committed.")
+    parser.add_argument("--fact-workers", type=int, default=FACT_WORKERS,
+                        help="Fact table chunks inserted at the same time.")
+    parser.add_argument("--fact-chunk-days", type=int, default=FACT_CHUNK_DAYS,
+                        help="Days of order dates per fact table chunk.")
+    parser.add_argument("--build-workers", type=int, default=BUILD_WORKERS,
+                        help="Dimension builds run at the same time.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
     try:
         # Log the start of the main process
         logging.info('Starting the data transformation process...')
         
         # Create an SQLAlchemy engine
         logging.info(f"Connecting to the MySQL database at {HOST}...")
-        engine = create_engine(f"mysql+mysqlconnector://{USERNAME}:{PASSWORD}@{HOST}/{DATABASE}")
+        # The pool holds at least one connection per concurrent build step or fact chunk
+        engine = create_engine(f"mysql+mysqlconnector://{USERNAME}:{PASSWORD}@{HOST}/{DATABASE}",
+                               pool_size=max(5, args.fact_workers, args.build_workers))
         logging.info("Database connection established.")
-        
-        print("Running the transformation script...")
-        run_transformation_script()  # Call the existing transformation script
-        
-        # Log the creation of each dimension and fact table
-        logging.info("Creating dimension tables...")
 
-        create_dim_users(engine)
-        logging.info("dim_users table created.")
-        
-        create_dim_feedbacks(engine)
-        logging.info("dim_feedbacks table created.")
-        
-        create_dim_payments(engine)
-        logging.info("dim_payments table created.")
-        
-        create_dim_products(engine)
-        logging.info("dim_products table created.")
+        if args.resume_fact:
+            logging.info("Resuming the fact_order_items build...")
+            fill_fact_order_items(engine, args.fact_chunk_days, args.fact_workers, resume=True)
+            index_fact_order_items(engine)
+            publish_fact_order_items(engine)
+            logging.info('Fact table build resumed and completed successfully.')
+            return
         
-        create_dim_sellers(engine)
-        logging.info("dim_sellers table created.")
-        
-        create_dim_date(engine)
-        logging.info("dim_date table created.")
-        
-        create_dim_time(engine)
-        logging.info("dim_time table created.")
-        
-        # Log the creation of the fact table
-        logging.info("Creating fact_order_items table...")
-        create_fact_order_items(engine)
-        logging.info("fact_order_items table created.")
+        print("Running the transformation script...")
+        run_transformation_script(engine)  # Call the existing transformation script
         
-        # Log the insertion into fact table
-        logging.info("Inserting data into fact_order_items...")
-        insert_into_fact_order_items(engine)
-        logging.info("Data inserted into fact_order_items table.")
+        # Build the dimension tables in parallel, then the fact table
+        logging.info("Creating dimension and fact tables...")
+        report = build_star_schema(engine, args.fact_chunk_days, args.fact_workers, args.build_workers)
+        logging.info(f"Star schema build report:\n{report}")
+        print(report)
         
         # Log completion of the entire process
         logging.info('Data transformation process completed successfully.')
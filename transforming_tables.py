@@ -1,6 +1,16 @@
 import pandas as pd
+import numpy as np
+import os
+import sys
+import glob
+import hashlib
 import logging
-from sqlalchemy import create_engine, DateTime
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from decimal import Decimal
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.exc import SQLAlchemyError
 import config
 
@@ -14,33 +24,258 @@ PASSWORD = config.PASSWORD  # Password for the database
 HOST = config.HOST       # Database host (localhost for local development)
 DATABASE = config.DATABASE   # Name of the database being accessed
 
-# Create an SQLAlchemy engine for database connection
-try:
-    engine = create_engine(f"mysql+mysqlconnector://{USERNAME}:{PASSWORD}@{HOST}/{DATABASE}")
-    logging.info("Database connection established.")
-except SQLAlchemyError as e:
-    logging.error(f"Database connection error: {e}")
-    raise
+# Timestamp format of the date columns in the source tables
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-def load_tables(tables, engine):
-    """Load tables from the database into Pandas DataFrames."""
+# Columns read from each source table: the ones its transform and the star schema use
+SOURCE_COLUMNS = {
+    'feedbacks': ['FeedbackID', 'OrderID', 'FeedbackScore', 'FeedbackFormSentDate', 'FeedbackAnswerDate'],
+    'orders': ['OrderID', 'UserID', 'OrderStatus', 'OrderDate', 'OrderApprovedDate', 'PickupDate',
+               'DeliveredDate', 'EstimatedDeliveryDate'],
+    'order_items': ['OrderID', 'OrderItemID', 'ProductID', 'SellerID', 'Price'],
+    'payments': ['OrderID', 'PaymentSequential', 'PaymentType', 'PaymentInstallments', 'PaymentValue'],
+    'products': ['ProductID', 'ProductCategory', 'ProductNameLength', 'ProductDescriptionLength',
+                 'ProductPhotosQuantity', 'ProductWeightInGrams', 'ProductLengthInCm', 'ProductHeightInCm',
+                 'ProductWidthInCm'],
+    'sellers': ['SellerID', 'SellerZIPCode', 'SellerCity', 'SellerState'],
+    'users': ['UserID', 'UserZIPCode', 'UserCity', 'UserState'],
+}
+
+# Low-cardinality text columns kept as categoricals while loading
+CATEGORY_COLUMNS = {
+    'payments': ['PaymentType'],
+    'sellers': ['SellerCity', 'SellerState'],
+    'users': ['UserCity', 'UserState'],
+}
+
+# Rows fetched from the server-side cursor per chunk
+LOAD_CHUNKSIZE = 50000
+
+# Source tables of the transform stage
+TABLES = ["feedbacks", "orders", "order_items", "payments", "products", "sellers", "users"]
+
+# Transformed tables each transform needs besides its own source table
+TRANSFORM_DEPENDENCIES = {'orders': ['feedbacks']}
+
+# Worker threads running the stage's load, transform and save steps
+MAX_WORKERS = 4
+
+# Rows per batch when bulk-loading a staging table; mysql-connector sends each
+# batch as a single multi-row INSERT
+SAVE_CHUNKSIZE = 5000
+
+# Local Parquet cache of transformed frames, keyed by a fingerprint of their sources
+CACHE_DIR = "transform_cache"
+
+# Version of the transform code; any change to this module invalidates the cache
+with open(__file__, 'rb') as _source:
+    TRANSFORM_VERSION = hashlib.sha256(_source.read()).hexdigest()[:12]
+
+# Table holding the last processed change time of each watermarked source table
+WATERMARK_TABLE = "transform_watermarks"
+
+# Date columns whose latest value marks when a source row last changed
+CHANGE_COLUMNS = {
+    'orders': ['OrderDate', 'OrderApprovedDate', 'PickupDate', 'DeliveredDate'],
+    'feedbacks': ['FeedbackFormSentDate', 'FeedbackAnswerDate'],
+}
+
+# Key column each source table's rows are reloaded by in an incremental run
+DELTA_KEYS = {
+    'orders': 'OrderID',
+    'order_items': 'OrderID',
+    'payments': 'OrderID',
+    'feedbacks': 'FeedbackID',
+    'users': 'UserID',
+    'products': 'ProductID',
+    'sellers': 'SellerID',
+}
+
+# Table mapping the changed OrderIDs to each of the other reloaded keys
+DELTA_KEY_SOURCES = {
+    'FeedbackID': 'feedbacks',
+    'UserID': 'orders',
+    'ProductID': 'order_items',
+    'SellerID': 'order_items',
+}
+
+# Key of each transformed table that incremental runs replace rows by
+MERGE_KEYS = {
+    'feedbacks': 'FeedbackID',
+    'orders': 'OrderID',
+    'order_items': 'OrderID',
+    'payments': 'PaymentID',
+    'products': 'ProductID',
+    'sellers': 'SellerID',
+    'users': 'UserID',
+}
+
+# Characters of a TEXT merge key that its index covers; the keys are 32-character IDs
+MERGE_KEY_PREFIX = 64
+
+# SQLAlchemy engine for database connection, created on first use by get_engine()
+_engine = None
+
+def get_engine():
+    """Return the module's SQLAlchemy engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        try:
+            _engine = create_engine(f"mysql+mysqlconnector://{USERNAME}:{PASSWORD}@{HOST}/{DATABASE}")
+            logging.info("Database connection established.")
+        except SQLAlchemyError as e:
+            logging.error(f"Database connection error: {e}")
+            raise
+    return _engine
+
+def compact_dtypes(df, category_columns=()):
+    """
+    Shrink a chunk's dtypes: categoricals for the given text columns, DECIMAL values
+    as float64 and integer columns downcast to the smallest integer type.
+    Float columns are left as float64 so sums are unchanged.
+    """
+    for col in df.columns:
+        series = df[col]
+        if col in category_columns:
+            df[col] = series.astype('category')
+        elif series.dtype == object:
+            first = series.dropna().head(1)
+            if len(first) and isinstance(first.iloc[0], Decimal):
+                df[col] = series.astype('float64')
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+    return df
+
+def concat_chunks(chunks, columns, category_columns=()):
+    """Concatenate loaded chunks, giving each categorical column the union of the chunks' categories."""
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    for col in category_columns:
+        categories = sorted(set().union(*(chunk[col].cat.categories for chunk in chunks)))
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    numeric = {col for chunk in chunks for col in chunk.columns if pd.api.types.is_numeric_dtype(chunk[col])}
+    df = pd.concat(chunks, ignore_index=True)
+    # A chunk where a numeric column is entirely NULL comes back as object
+    for col in numeric:
+        if df[col].dtype == object:
+            df[col] = pd.to_numeric(df[col])
+    return df
+
+def load_table(table, engine, columns=None, chunksize=LOAD_CHUNKSIZE, where=None, params=None):
+    """
+    Stream a table through an unbuffered (server-side) cursor in chunks.
+
+    Only the given columns are selected, and every chunk gets compact dtypes as
+    soon as it is fetched, so the full table never exists as object columns.
+    An optional WHERE clause (with pyformat params) restricts the rows read.
+    """
+    select_list = ", ".join(columns) if columns else "*"
+    query = f"SELECT {select_list} FROM {table}" + (f" WHERE {where}" if where else "")
+    category_columns = CATEGORY_COLUMNS.get(table, [])
+    connection = engine.raw_connection()
     try:
-        logging.info(f"Loading tables: {tables}")
-        return {table: pd.read_sql(f"SELECT * FROM {table}", con=engine) for table in tables}
-    except SQLAlchemyError as e:
-        logging.error(f"Error loading tables: {e}")
-        return {}
+        cursor = connection.cursor(buffered=False)
+        cursor.execute(query, params or {})
+        names = [description[0] for description in cursor.description]
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            chunks.append(compact_dtypes(pd.DataFrame.from_records(rows, columns=names), category_columns))
+        cursor.close()
+    finally:
+        connection.close()
+    df = concat_chunks(chunks, names, category_columns)
+    memory = df.memory_usage(deep=True).sum() / 2 ** 20
+    logging.info(f"Loaded {table}: {len(df)} rows, {memory:.1f} MiB in memory.")
+    return df
+
+def parse_dates(series):
+    """Parse a date column with DATE_FORMAT, keeping columns that are already datetime64 as they are."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, format=DATE_FORMAT, errors='coerce')
+
+def string_categories(series, convert=str):
+    """
+    Return convert() of each value (str by default) as a categorical with sorted categories.
+    Only the distinct values are converted, instead of building a string per row as
+    astype(str) or .str.title() do. Missing values stay missing.
+    """
+    codes, levels = pd.factorize(series)
+    names, ranks = np.unique(np.array([convert(value) for value in levels.tolist()], dtype=object),
+                             return_inverse=True)
+    codes = np.where(codes >= 0, ranks[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=names), index=series.index)
+
+def factorize_keys(df, keys):
+    """
+    Factorize the key columns into sorted integer codes. Returns (keys, codes, levels),
+    which join_sorted_by_group calls on several columns of the same frame can share.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    key_codes, key_levels = zip(*(pd.factorize(df[key], sort=True) for key in keys))
+    return keys, key_codes, key_levels
+
+def join_sorted_by_group(df, keys, column, unique=False, groups=None):
+    """
+    Join each group's values of a column into a ', ' separated string, in the column's sort order.
+
+    The keys and the column are factorized into sorted integer codes and the rows are
+    ordered once with np.lexsort, so every group is a contiguous run of sorted values.
+    The separators are added to all but the first value of each run, and np.add.reduceat
+    concatenates the runs without calling a Python function per group. With unique=True
+    repeated values within a group are kept once. Rows with a missing key are dropped,
+    as groupby does. groups is the factorize_keys(df, keys) result when the caller
+    already has it.
+    Returns a Series of joined strings indexed like df.groupby(keys).
+    """
+    keys, key_codes, key_levels = groups or factorize_keys(df, keys)
+    value_codes, values = pd.factorize(df[column], sort=True, use_na_sentinel=False)
+
+    # np.lexsort sorts by its last array first
+    order = np.lexsort([value_codes] + list(key_codes[::-1]))
+    order = order[np.all([codes[order] >= 0 for codes in key_codes], axis=0)]
+
+    new_group = np.ones(len(order), dtype=bool)
+    for codes in key_codes:
+        sorted_codes = codes[order]
+        new_group[1:] &= sorted_codes[1:] == sorted_codes[:-1]
+    new_group = ~new_group
+    new_group[:1] = True
+    if unique:
+        sorted_values = value_codes[order]
+        keep = new_group.copy()
+        keep[1:] |= sorted_values[1:] != sorted_values[:-1]
+        order, new_group = order[keep], new_group[keep]
+    starts = np.flatnonzero(new_group)
+
+    if len(keys) > 1:
+        group_codes = [codes[order[starts]] for codes in key_codes]
+        index = pd.MultiIndex(levels=list(key_levels), codes=group_codes, names=keys)
+    else:
+        # Every key value has rows, so the groups are exactly the sorted key values
+        index = key_levels[0].rename(keys[0])
+    if len(order) == 0:
+        return pd.Series([], index=index, dtype=object)
+
+    strings = np.array(list(map(str, values.tolist())), dtype=object)[value_codes[order]]
+    strings[~new_group] = ', ' + strings[~new_group]
+    return pd.Series(np.add.reduceat(strings, starts), index=index)
 
 def transform_payments(df):
     """Transform the payments table by aggregating payment information for each order."""
     try:
         df['OrderID'] = df['OrderID'].astype(str)
         df['PaymentSequential'] = df['PaymentSequential'].astype(int)
-        df = df.groupby('OrderID').agg({
-            'PaymentSequential': lambda x: ', '.join(map(str, sorted(x))),
-            'PaymentType': lambda x: ', '.join(x.iloc[x.argsort()].tolist()),
-            'PaymentInstallments': lambda x: ', '.join(map(str, x.iloc[x.argsort()])),
-            'PaymentValue': 'sum'
+        # Each joined column lists the order's values in that column's own sort order
+        df = pd.DataFrame({
+            'PaymentSequential': join_sorted_by_group(df, 'OrderID', 'PaymentSequential'),
+            'PaymentType': join_sorted_by_group(df, 'OrderID', 'PaymentType'),
+            'PaymentInstallments': join_sorted_by_group(df, 'OrderID', 'PaymentInstallments'),
+            'PaymentValue': df.groupby('OrderID')['PaymentValue'].sum()
         }).reset_index()
         df.rename(columns={'OrderID': 'PaymentID'}, inplace=True)
         df['PaymentType'] = df['PaymentType'].str.replace('_', ' ').str.title()
@@ -56,8 +291,8 @@ def transform_feedbacks(df):
         df['FeedbackID'] = df['FeedbackID'].astype(str)
         df['FeedbackScore'] = df['FeedbackScore'].astype(int)
         df['FeedbackID'] = df.groupby('FeedbackID').cumcount().astype(str) + "_" + df['FeedbackID']
-        df['FeedbackFormSentDate'] = pd.to_datetime(df['FeedbackFormSentDate'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
-        df['FeedbackAnswerDate'] = pd.to_datetime(df['FeedbackAnswerDate'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+        df['FeedbackFormSentDate'] = parse_dates(df['FeedbackFormSentDate'])
+        df['FeedbackAnswerDate'] = parse_dates(df['FeedbackAnswerDate'])
         logging.info("Feedbacks table transformed successfully.")
         return df
     except Exception as e:
@@ -94,14 +329,16 @@ def transform_order_items(df):
     try:
         if 'PickupLimitDate' in df.columns:
             df.drop(columns=['PickupLimitDate'], inplace=True)
-        df['ProductSellerPair'] = df['ProductID'].astype(str) + '-' + df['SellerID'].astype(str)
-        df = df.groupby(['OrderID', 'ProductSellerPair']).agg({
-            'OrderItemID': lambda x: ', '.join(map(str, sorted(x))),
-            'Price': 'sum'
+        df['ProductID'] = df['ProductID'].astype(str)
+        df['SellerID'] = df['SellerID'].astype(str)
+        keys = ['OrderID', 'ProductID', 'SellerID']
+        grouped = df.groupby(keys)
+        df = pd.DataFrame({
+            'OrderItemID': join_sorted_by_group(df, keys, 'OrderItemID'),
+            'Price': grouped['Price'].sum(),
+            'Quantity': grouped.size()
         }).reset_index()
-        df[['ProductID', 'SellerID']] = df['ProductSellerPair'].str.split('-', expand=True)
-        df.drop(columns=['ProductSellerPair'], inplace=True)
-        df['Quantity'] = df['OrderItemID'].apply(lambda x: len(x.split(', ')))
+        df = df[['OrderID', 'OrderItemID', 'Price', 'ProductID', 'SellerID', 'Quantity']]
         logging.info("Order items table transformed successfully.")
         return df
     except Exception as e:
@@ -111,14 +348,17 @@ def transform_order_items(df):
 def transform_users(df):
     """Transform the users table."""
     try:
-        df['UserZIPCode'] = df['UserZIPCode'].astype(str)
+        # Converted as categoricals, so only each distinct value gets a new string
+        df['UserZIPCode'] = string_categories(df['UserZIPCode'])
         df['UserID'] = df['UserID'].astype(str)
-        df['UserCity'] = df['UserCity'].str.title()
-        df['UserState'] = df['UserState'].str.title()
-        df = df.groupby('UserID').agg({
-            'UserZIPCode': lambda x: ', '.join(sorted(x.unique())),
-            'UserCity': lambda x: ', '.join(sorted(x.unique())),
-            'UserState': lambda x: ', '.join(sorted(x.unique()))
+        df['UserCity'] = string_categories(df['UserCity'], str.title)
+        df['UserState'] = string_categories(df['UserState'], str.title)
+        # Each column lists the user's distinct values in sorted order; the users are
+        # factorized once for all three columns
+        groups = factorize_keys(df, 'UserID')
+        df = pd.DataFrame({
+            col: join_sorted_by_group(df, 'UserID', col, unique=True, groups=groups)
+            for col in ['UserZIPCode', 'UserCity', 'UserState']
         }).reset_index()
         logging.info("Users table transformed successfully.")
         return df
@@ -131,7 +371,7 @@ def transform_orders(df, df_feedbacks):
     try:
         date_columns = ['OrderDate', 'OrderApprovedDate', 'PickupDate', 'DeliveredDate', 'EstimatedDeliveryDate']
         for col in date_columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+            df[col] = parse_dates(df[col])
         df = df.merge(df_feedbacks[['OrderID', 'FeedbackID']], on='OrderID', how='left')
         logging.info("Orders table transformed successfully.")
         return df
@@ -139,36 +379,400 @@ def transform_orders(df, df_feedbacks):
         logging.error(f"Error transforming orders: {e}")
         return pd.DataFrame()
 
-def save_transformed_tables(dataframes, engine):
-    """Save transformed tables to the database."""
+def swap_in_table(engine, staging_table, table_name, foreign_key_checks=True):
+    """
+    Replace table_name with staging_table in one atomic RENAME TABLE and drop the old copy.
+    With foreign_key_checks=False the checks are off for the swap, so a table that other
+    tables reference (e.g. a star schema dimension) can be replaced.
+    """
+    old_table = table_name + "_old"
+    with engine.begin() as conn:
+        if not foreign_key_checks:
+            conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+        try:
+            conn.execute(text(f"DROP TABLE IF EXISTS {old_table}"))
+            if inspect(conn).has_table(table_name):
+                conn.execute(text(f"RENAME TABLE {table_name} TO {old_table}, {staging_table} TO {table_name}"))
+                conn.execute(text(f"DROP TABLE {old_table}"))
+            else:
+                conn.execute(text(f"RENAME TABLE {staging_table} TO {table_name}"))
+        finally:
+            if not foreign_key_checks:
+                conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+
+def ensure_merge_key_index(engine, table_name, key):
+    """
+    Index a transformed table's merge key, so incremental merges find the rows to
+    replace by index instead of scanning the table. to_sql writes string keys as
+    TEXT, which is indexed on its first MERGE_KEY_PREFIX characters.
+    """
+    # Named after the published table, so the index keeps its name when a staging table is swapped in
+    index_name = f"ix_{table_name.removesuffix('_staging')}_{key}"
+    with engine.begin() as conn:
+        exists = conn.execute(text("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = :table_name AND index_name = :index_name
+        """), {"table_name": table_name, "index_name": index_name}).scalar()
+        if exists:
+            return
+        data_type = conn.execute(text("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = :table_name AND column_name = :key
+        """), {"table_name": table_name, "key": key}).scalar()
+        prefix = f"({MERGE_KEY_PREFIX})" if data_type in ("text", "mediumtext", "longtext") else ""
+        conn.execute(text(f"CREATE INDEX {index_name} ON {table_name} ({key}{prefix})"))
+
+def save_transformed_table(engine, table, df):
+    """
+    Save a single transformed table and return the DataFrame. Date columns are datetime64
+    and are written as DATETIME.
+
+    The table is bulk-loaded into a staging table in batches of SAVE_CHUNKSIZE rows,
+    its merge key is indexed, and it is then swapped in atomically, so readers never
+    see a missing or half-filled table.
+    Errors are raised, so the transform stage fails (and keeps its watermarks) when a save fails.
+    """
+    transformed_table_name = "transformed_" + table
+    staging_table = transformed_table_name + "_staging"
+    start = time.perf_counter()
+    df.to_sql(name=staging_table, con=engine, if_exists='replace', index=False, chunksize=SAVE_CHUNKSIZE)
+    if table in MERGE_KEYS and MERGE_KEYS[table] in df.columns:
+        ensure_merge_key_index(engine, staging_table, MERGE_KEYS[table])
+    swap_in_table(engine, staging_table, transformed_table_name)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Saved {transformed_table_name} back to the database: {len(df)} rows in "
+                 f"{elapsed:.2f}s ({len(df) / max(elapsed, 1e-9):.0f} rows/s).")
+    return df
+
+def run_transform(table, transform, df, *dependencies):
+    """
+    Run a transform step. The transform_* functions log their errors and return an
+    empty DataFrame; an empty result from a non-empty input is raised as a failure
+    here so the stage stops before saving or advancing the watermarks.
+    """
+    had_rows = not df.empty
+    result = transform(df, *dependencies)
+    if had_rows and result.empty:
+        raise RuntimeError(f"Transforming {table} failed; see the error logged above.")
+    return result
+
+def merge_transformed_table(engine, table, df):
+    """
+    Merge a transformed delta into its transformed_* table and return the DataFrame.
+
+    The delta is written to a staging table, then rows with the same merge key are
+    deleted (through the key's index) and the delta inserted in one transaction.
+    Errors are raised so the watermarks are not advanced past a failed merge.
+    """
+    transformed_table_name = "transformed_" + table
+    if df.empty:
+        logging.info(f"No changes to merge into {transformed_table_name}.")
+        return df
+    staging_table = transformed_table_name + "_staging"
+    key = MERGE_KEYS[table]
+    start = time.perf_counter()
+    df.to_sql(name=staging_table, con=engine, if_exists='replace', index=False, chunksize=SAVE_CHUNKSIZE)
+    if not inspect(engine).has_table(transformed_table_name):
+        ensure_merge_key_index(engine, staging_table, key)
+        swap_in_table(engine, staging_table, transformed_table_name)
+    else:
+        # Tables saved before the merge key was indexed get the index on their first merge
+        ensure_merge_key_index(engine, transformed_table_name, key)
+        column_list = ", ".join(f"`{col}`" for col in df.columns)
+        with engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {transformed_table_name} "
+                              f"WHERE {key} IN (SELECT {key} FROM {staging_table})"))
+            conn.execute(text(f"INSERT INTO {transformed_table_name} ({column_list}) "
+                              f"SELECT {column_list} FROM {staging_table}"))
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE {staging_table}"))
+    logging.info(f"Merged {len(df)} changed rows into {transformed_table_name} "
+                 f"in {time.perf_counter() - start:.2f}s.")
+    return df
+
+def table_checksums(engine, tables):
+    """Return "table:row count:CHECKSUM TABLE value" for each table, for building fingerprints."""
+    parts = []
+    with engine.connect() as conn:
+        for table in tables:
+            count = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            checksum = conn.execute(text(f"CHECKSUM TABLE {table}")).fetchone()[1]
+            parts.append(f"{table}:{count}:{checksum}")
+    return parts
+
+def source_fingerprint(engine, table):
+    """
+    Fingerprint the source tables a transformed table is built from: each one's
+    row count and CHECKSUM TABLE value, plus the transform code version.
+    """
+    parts = [TRANSFORM_VERSION] + table_checksums(engine, [table] + TRANSFORM_DEPENDENCIES.get(table, []))
+    return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()[:16]
+
+def cache_path(table, fingerprint, cache_dir=CACHE_DIR):
+    """Return the cache file path of a transformed table for a source fingerprint."""
+    return os.path.join(cache_dir, f"{table}-{fingerprint}.parquet")
+
+def write_cache(table, fingerprint, df, cache_dir=CACHE_DIR):
+    """Write a transformed frame to the cache atomically and drop the table's older entries."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(table, fingerprint, cache_dir)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    for old_path in glob.glob(os.path.join(cache_dir, f"{table}-*.parquet")):
+        if old_path != path:
+            os.remove(old_path)
+
+def load_cached_or_table(table, engine, cache_dir=CACHE_DIR):
+    """
+    Return (fingerprint, frame, cached). On a cache hit the frame is the transformed
+    table memory-mapped from the cache; otherwise it is the freshly loaded source table.
+    """
+    fingerprint = source_fingerprint(engine, table)
+    path = cache_path(table, fingerprint, cache_dir)
+    if os.path.exists(path):
+        logging.info(f"Using cached transformed {table} ({fingerprint}).")
+        return fingerprint, pd.read_parquet(path, memory_map=True), True
+    logging.info(f"No cached transformed {table} for {fingerprint}; loading the source table.")
+    return fingerprint, load_table(table, engine, SOURCE_COLUMNS.get(table)), False
+
+def transform_cached(table, transform, loaded, *dependencies):
+    """Transform a table loaded by load_cached_or_table, caching the result unless it came from the cache."""
+    fingerprint, df, cached = loaded
+    if cached:
+        return df
+    df = run_transform(table, transform, df, *dependencies)
+    # An empty source gives an empty frame, which is not worth caching
+    if not df.empty:
+        write_cache(table, fingerprint, df)
+    return df
+
+def change_expression(columns):
+    """SQL for a row's latest change time: the greatest of its non-NULL change columns."""
+    first = columns[0]
+    return "GREATEST(" + ", ".join([first] + [f"COALESCE({col}, {first})" for col in columns[1:]]) + ")"
+
+def read_watermarks(engine):
+    """Return the stored watermark of each source table, creating the watermark table if needed."""
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+                TableName VARCHAR(64) PRIMARY KEY,
+                Watermark VARCHAR(32),
+                UpdatedAt DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            );
+        """))
+        rows = conn.execute(text(f"SELECT TableName, Watermark FROM {WATERMARK_TABLE}"))
+        return {table: watermark for table, watermark in rows if watermark is not None}
+
+def current_watermarks(engine):
+    """Return the latest change time in each watermarked source table."""
+    with engine.connect() as conn:
+        return {table: conn.execute(text(f"SELECT MAX({change_expression(columns)}) FROM {table}")).scalar()
+                for table, columns in CHANGE_COLUMNS.items()}
+
+def save_watermarks(engine, watermarks):
+    """Store the watermarks reached by a successful run."""
+    with engine.begin() as conn:
+        for table, watermark in watermarks.items():
+            if watermark is None:
+                continue
+            conn.execute(text(f"INSERT INTO {WATERMARK_TABLE} (TableName, Watermark) VALUES (:table, :watermark) "
+                              f"ON DUPLICATE KEY UPDATE Watermark = VALUES(Watermark)"),
+                         {"table": table, "watermark": str(watermark)})
+    logging.info(f"Saved watermarks: {watermarks}")
+
+def in_filter(column, values):
+    """Return a (WHERE clause, pyformat params) pair selecting rows whose column is one of the values."""
+    if not values:
+        return "FALSE", {}
+    params = {f"{column}_{i}": value for i, value in enumerate(values)}
+    return f"{column} IN ({', '.join(f'%({name})s' for name in params)})", params
+
+def changed_keys(engine, watermarks):
+    """
+    Return the keys an incremental run reloads, by key column.
+
+    Changed orders are those with any order or feedback date at or after the
+    stored watermarks. Each date column is compared on its own rather than
+    through GREATEST(), so the comparisons can use an index on the column.
+    The related feedback, user, product and seller keys are then looked up
+    once for all changed orders. Rows at the watermark itself are read again,
+    which is harmless because merges replace rows by key.
+    """
+    with engine.connect() as conn:
+        changed = set()
+        for table, columns in CHANGE_COLUMNS.items():
+            where = " OR ".join(f"{col} >= %(watermark)s" for col in columns)
+            changed.update(conn.exec_driver_sql(f"SELECT OrderID FROM {table} WHERE {where}",
+                                                {"watermark": watermarks[table]}).scalars())
+        keys = {'OrderID': sorted(changed)}
+        where, params = in_filter('OrderID', keys['OrderID'])
+        for key, table in DELTA_KEY_SOURCES.items():
+            values = conn.exec_driver_sql(f"SELECT DISTINCT {key} FROM {table} WHERE {where}", params).scalars()
+            keys[key] = sorted(value for value in values if value is not None)
+    return keys
+
+def delta_filters(engine, watermarks):
+    """
+    Build each source table's (WHERE clause, params) for an incremental run.
+    The changed keys are computed once and every load filters on a plain key
+    list, instead of each load re-running the change subqueries.
+    """
+    keys = changed_keys(engine, watermarks)
+    logging.info(f"Incremental run covers {len(keys['OrderID'])} changed orders.")
+    return {table: in_filter(column, keys[column]) for table, column in DELTA_KEYS.items()}
+
+def run_dag(steps, max_workers=MAX_WORKERS):
+    """
+    Run a graph of steps on a thread pool, each as soon as its dependencies are done.
+
+    steps maps a step name to (function, dependency names); the function is called
+    with the dependencies' results as positional arguments, in the order listed.
+    Returns (results, timings) with timings mapping each step to its (start, end).
+    An exception in a step stops scheduling and is raised once running steps finish.
+    """
+    results, timings = {}, {}
+    pending = dict(steps)
+    running = {}
+
+    def timed(name, function, args):
+        start = time.perf_counter()
+        result = function(*args)
+        timings[name] = (start, time.perf_counter())
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name, (function, dependencies) in list(pending.items()):
+                if all(dependency in results for dependency in dependencies):
+                    args = [results[dependency] for dependency in dependencies]
+                    running[pool.submit(timed, name, function, args)] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Unresolvable step dependencies: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.exception() is not None:
+                    wait(running)
+                    raise future.exception()
+                results[name] = future.result()
+    return results, timings
+
+def critical_path(steps, timings):
+    """Return (step names, seconds) of the dependency chain with the longest total step time."""
+    longest = {}
+    for name in sorted(timings, key=lambda step: timings[step][1]):
+        duration = timings[name][1] - timings[name][0]
+        chains = [longest[dependency] for dependency in steps[name][1]]
+        path, seconds = max(chains, key=lambda chain: chain[1], default=([], 0.0))
+        longest[name] = (path + [name], seconds + duration)
+    return max(longest.values(), key=lambda chain: chain[1], default=([], 0.0))
+
+def transform_steps(tables, engine, filters=None, merge=False, cache=False):
+    """
+    Build the load -> transform -> save step graph for the given source tables.
+
+    filters maps a table to the (where, params) its load step reads with; with
+    merge=True the results are merged into the transformed tables instead of replacing them.
+    With cache=True tables whose sources are unchanged come from the Parquet cache.
+    """
+    filters = filters or {}
+    save = merge_transformed_table if merge else save_transformed_table
+    transforms = {
+        'feedbacks': transform_feedbacks,
+        'orders': transform_orders,
+        'order_items': transform_order_items,
+        'payments': transform_payments,
+        'products': transform_products,
+        'sellers': transform_sellers,
+        'users': transform_users,
+    }
+    steps = {}
+    for table in tables:
+        dependencies = [f"transform_{dependency}" for dependency in TRANSFORM_DEPENDENCIES.get(table, [])]
+        if cache:
+            steps[f"load_{table}"] = (partial(load_cached_or_table, table, engine), [])
+            steps[f"transform_{table}"] = (partial(transform_cached, table, transforms[table]),
+                                           [f"load_{table}"] + dependencies)
+        else:
+            where, params = filters.get(table, (None, None))
+            steps[f"load_{table}"] = (partial(load_table, table, engine, SOURCE_COLUMNS.get(table),
+                                              where=where, params=params), [])
+            steps[f"transform_{table}"] = (partial(run_transform, table, transforms[table]),
+                                           [f"load_{table}"] + dependencies)
+        steps[f"save_{table}"] = (partial(save, engine, table), [f"transform_{table}"])
+    return steps
+
+def log_loaded_memory(results):
+    """Log the memory held by the source tables the stage loaded; cache hits are not counted."""
+    total = 0
+    for table in TABLES:
+        loaded = results[f"load_{table}"]
+        if isinstance(loaded, tuple):
+            _, loaded, cached = loaded
+            if cached:
+                continue
+        total += loaded.memory_usage(deep=True).sum()
+    logging.info(f"Loaded tables use {total / 2 ** 20:.1f} MiB in memory.")
+
+def log_timings(timings, steps):
+    """Log every step's duration, the stage's wall time and its critical path."""
+    for name, (start, end) in sorted(timings.items(), key=lambda item: item[1][0]):
+        logging.info(f"Step {name} took {end - start:.2f}s.")
+    wall = max(end for _, end in timings.values()) - min(start for start, _ in timings.values())
+    total = sum(end - start for start, end in timings.values())
+    path, seconds = critical_path(steps, timings)
+    logging.info(f"Transform stage took {wall:.2f}s wall time for {total:.2f}s of steps; "
+                 f"critical path {' -> '.join(path)} ({seconds:.2f}s).")
+
+def run_transform_stage(engine=None, incremental=False, use_cache=True):
+    """
+    Run the transform stage and return the transformed DataFrames by table.
+
+    Callers that already hold an engine (e.g. star_schema) pass it in so the stage
+    shares their connection pool; otherwise the module's own engine is used.
+
+    An incremental run only reloads and transforms the orders changed since the
+    stored watermarks (and the rows related to them) and merges the results into
+    the existing transformed tables. Without stored watermarks it falls back to a full run.
+    Full runs take unchanged tables from the Parquet cache unless use_cache is False.
+    """
+    engine = engine or get_engine()
+    watermarks = read_watermarks(engine)
+    # Taken before reading so rows arriving during the run are picked up next time
+    new_watermarks = current_watermarks(engine)
+    if incremental and all(table in watermarks for table in CHANGE_COLUMNS):
+        logging.info(f"Incremental run from watermarks {watermarks}")
+        steps = transform_steps(TABLES, engine, delta_filters(engine, watermarks), merge=True)
+    else:
+        if incremental:
+            logging.info("No watermarks stored yet; running a full transform.")
+        steps = transform_steps(TABLES, engine, cache=use_cache)
+    # run_dag raises if any transform or save failed, so the watermarks only advance
+    # once every table of the run has been written
+    results, timings = run_dag(steps)
+    log_loaded_memory(results)
+    log_timings(timings, steps)
+    save_watermarks(engine, new_watermarks)
+    return {table: results[f"transform_{table}"] for table in TABLES}
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Transform the source tables into transformed_* tables.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only transform orders changed since the last run and merge them.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute every table instead of using the cache of transformed frames.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
     try:
-        date_columns = {
-            'transformed_feedbacks': ['FeedbackFormSentDate', 'FeedbackAnswerDate'],
-            'transformed_orders': ['OrderDate', 'OrderApprovedDate', 'PickupDate', 'DeliveredDate', 'EstimatedDeliveryDate'],
-        }
-        for table, df in dataframes.items():
-            transformed_table_name = "transformed_" + table
-            dtype_mapping = {col: DateTime() for col in date_columns.get(transformed_table_name, [])}
-            df.to_sql(name=transformed_table_name, con=engine, if_exists='replace', index=False, dtype=dtype_mapping)
-            logging.info(f"Saved {transformed_table_name} back to the database.")
-    except SQLAlchemyError as e:
-        logging.error(f"Error saving transformed tables: {e}")
-
-# Main execution
-try:
-    tables = ["feedbacks", "orders", "order_items", "payments", "products", "sellers", "users"]
-    dataframes = load_tables(tables, engine)
-    logging.info("Loaded all tables.")
-
-    dataframes['payments'] = transform_payments(dataframes['payments'])
-    dataframes['feedbacks'] = transform_feedbacks(dataframes['feedbacks'])
-    dataframes['products'] = transform_products(dataframes['products'])
-    dataframes['sellers'] = transform_sellers(dataframes['sellers'])
-    dataframes['order_items'] = transform_order_items(dataframes['order_items'])
-    dataframes['users'] = transform_users(dataframes['users'])
-    dataframes['orders'] = transform_orders(dataframes['orders'], dataframes['feedbacks'])
-
-    save_transformed_tables(dataframes, engine)
-    logging.info("All transformations completed successfully.")
-except Exception as e:
-    logging.error(f"Unexpected error in script execution: {e}")
+        run_transform_stage(incremental=args.incremental, use_cache=not args.no_cache)
+        logging.info("All transformations completed successfully.")
+    except Exception as e:
+        logging.error(f"Unexpected error in script execution: {e}")
+
+if __name__ == "__main__":
+    main()